@@ -1,5 +1,6 @@
 # locales.py - Module for handling multiple languages in the Android TV Time Fixer application
-from typing import Dict, Any
+from string import Formatter
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum, auto
 
@@ -14,15 +15,75 @@ class Translation:
     en: str  # English translation
     ru: str  # Russian translation
 
+# Compiled template: (raw text, text rendered without parameters, pre-split parts or None)
+# Parts are (literal, field name, format spec, conversion); None means the template
+# uses positional or nested fields and is rendered with str.format instead
+CompiledTemplate = Tuple[str, str, Optional[List[Tuple[str, Optional[str], str, Optional[str]]]]]
+
+_CONVERSIONS = {'r': repr, 's': str, 'a': ascii}
+
+def compile_template(text: str) -> CompiledTemplate:
+    """Pre-split a str.format template so rendering skips format string parsing"""
+    parts = []
+    try:
+        for literal, field_name, format_spec, conversion in Formatter().parse(text):
+            if field_name is not None and (
+                not field_name.isidentifier() or (format_spec and '{' in format_spec)
+            ):
+                return text, text, None
+            parts.append((literal, field_name, format_spec or '', conversion))
+    except ValueError:
+        # Malformed template: keep str.format behaviour (and its error) at render time
+        return text, text, None
+
+    if all(field_name is None for _, field_name, _, _ in parts):
+        # No parameters: the rendered text is computed once and cached
+        return text, ''.join(literal for literal, _, _, _ in parts), []
+    return text, text, parts
+
 class Locales:
     def __init__(self):
         # Default language is English
-        self.current_language: Language = Language.RU
-        
+        self.current_language: Language = Language.EN
+        self._translations: Optional[Dict[str, Translation]] = None
+        # Compiled catalogs, built on first use of each language
+        self._catalogs: Dict[Language, Dict[str, CompiledTemplate]] = {}
+
+    @property
+    def translations(self) -> Dict[str, Translation]:
+        """Source translations for all languages, built on first access"""
+        if self._translations is None:
+            self._translations = self._load_translations()
+        return self._translations
+
+    def _load_catalog(self, language: Language) -> Dict[str, CompiledTemplate]:
+        """Compile the catalog for one language into a plain dict"""
+        if self._translations is not None:
+            attribute = language.name.lower()
+            texts = {
+                key: getattr(translation, attribute)
+                for key, translation in self._translations.items()
+            }
+        else:
+            # Only the requested language is built; other languages are never materialized
+            texts = self._load_translations(language)
+        catalog = {key: compile_template(text) for key, text in texts.items()}
+        self._catalogs[language] = catalog
+        return catalog
+
+    def _load_translations(self, language: Optional[Language] = None) -> Dict[str, Any]:
+        """Build Translation entries, or only the plain strings of one language"""
+        attribute = language.name.lower() if language is not None else ''
+
+        def pick(**texts: str) -> str:
+            return texts[attribute]
+
+        entry: Callable[..., Any] = Translation if language is None else pick
+
         # Dictionary containing all translations
-        self.translations: Dict[str, Translation] = {
+        return {
             # Disclaimer text
-            "disclaimer": Translation(
+            "disclaimer": entry(
                 en="""
 ==========================================
 WARNING: This program is provided "as is".
@@ -38,130 +99,130 @@ arising from the use of this program.
 ==========================================
 """
             ),
-            "program_title": Translation(
+            "program_title": entry(
                 en="\nAndroid TV Time Server Correction",
                 ru="\nКорректировка сервера времени для Android TV"
             ),
-            "please_ensure": Translation(
+            "please_ensure": entry(
                 en="\nPlease ensure the following is done:",
                 ru="\nПожалуйста, убедитесь, что следующее сделано:"
             ),
-            "adb_setup": Translation(
+            "adb_setup": entry(
                 en="1. Enable ADB debugging on your TV or Nvidia Shield:",
                 ru="1. Включите отладку ADB на вашем ТВ или Nvidia Shield:"
             ),
-            "adb_steps": Translation(
+            "adb_steps": entry(
                 en="   Settings > Device Preferences > About > Build (press 7 times or more)",
                 ru="   Настройки > Настройки устройства > Об устройстве > Сборка (нажмите 7 раз или более)"
             ),
-            "adb_network": Translation(
+            "adb_network": entry(
                 en="   Then: Device Preferences > Developer options > Network debugging (Enable)",
                 ru="   Затем: Настройки устройства > Для разработчиков > Отладка по сети (Включить)"
             ),
-            "auto_time_date": Translation(
+            "auto_time_date": entry(
                 en="2. Set time and date to automatic mode:",
                 ru="2. Установите время и дату в автоматический режим: Настройки > Настройки устройства > Дата и Время > Автонастройка доты и времени > Использовать время сити"
             ),
-            "network_requirement": Translation(
+            "network_requirement": entry(
                 en="3. Your TV, Nvidia Shield, and PC must be connected to the same network.",
                 ru="3. Ваш ТВ, Nvidia Shield и ПК должны быть подключены к одной сети"
             ),
-            "press_enter_to_continue": Translation(
+            "press_enter_to_continue": entry(
                 en="\nPress Enter to continue...",
                 ru="\nНажмите Enter, чтобы продолжить..."
             ),
             # logger-warning
-            "logger_warning": Translation(
+            "logger_warning": entry(
                 en="Failed to load the saved servers: {error}",
                 ru="Не удалось загрузить сохраненные серверы: {error}"
             ),
             # logger-warning_2
-            "logger_warning_2": Translation(
+            "logger_warning_2": entry(
                 en="Failed to save servers: {error}",
                 ru="Не удалось сохранить серверы: {error}"
             ),
             # copy_server_to_clipboard
-            "copy_to_clipboard": Translation(
+            "copy_to_clipboard": entry(
                 en="Failed to copy to clipboard: {error}",
                 ru="Не удалось скопировать в буфер обмена: {error}"
             ),            
             # copy_server_to_clipboard2
-            "copy_to_clipboard_2": Translation(
+            "copy_to_clipboard_2": entry(
                 en="Failed to paste from clipboard: {error}",
                 ru="Не удалось вставить из буфера обмена: {error}"
             ),
             # gen_keys
-            "gen_keys": Translation(
+            "gen_keys": entry(
                 en="ADB keys generated successfully",
                 ru="Ключи ADB сгенерированы успешно"
             ),
-            "existing_adb_keys": Translation(
+            "existing_adb_keys": entry(
             en="Existing ADB keys are being used",
             ru="Используются существующие ключи ADB"
             ),
 
-            "key_generation_error": Translation(
+            "key_generation_error": entry(
             en="Failed to generate keys: {error}",
             ru="Не удалось сгенерировать ключи: {error}"
             ),
             
-            "adb_keys_not_found": Translation(
+            "adb_keys_not_found": entry(
             en="ADB keys not found. Please generate them first.",
             ru="Ключи ADB не найдены. Пожалуйста, сначала сгенерируйте их."
             ),
             
-            "key_loading_error": Translation(
+            "key_loading_error": entry(
             en="Failed to load keys: {error}",
             ru="Не удалось загрузить ключи: {error}"
             ),
             
-            "no_connected_devices": Translation(
+            "no_connected_devices": entry(
             en="No connected devices.",
             ru="Нет подключенных устройств."
             ),
             
-            "choose_device_to_connect": Translation(
+            "choose_device_to_connect": entry(
                 en="Select a device to connect:",
                 ru="Выберите устройство для подключения:"
             ),
-            "enter_device_number": Translation(
+            "enter_device_number": entry(
                 en="Enter the device number: ",
                 ru="Введите номер устройства: "
             ),
-            "invalid_device_number": Translation(
+            "invalid_device_number": entry(
                 en="Invalid device number.",
                 ru="Неверный номер устройства."
             ),
-            "invalid_input": Translation(
+            "invalid_input": entry(
                 en="Invalid input.",
                 ru="Некорректный ввод."
             ),
-            "connecting_to_device": Translation(
+            "connecting_to_device": entry(
                 en="Connecting to device {device_id}...",
                 ru="Подключение к устройству {device_id}..."
             ),
             
-            "current_device_info": Translation(
+            "current_device_info": entry(
                 en="\nCurrent device information:\n",
                 ru="\nТекущая информация об устройстве:\n"
             ),
-            "confirm_connection": Translation(
+            "confirm_connection": entry(
                 en="Please confirm the connection on the TV screen if prompted.",
                 ru="Пожалуйста, подтвердите подключение на экране ТВ, если появится запрос."
             ),
-            "connection_success": Translation(
+            "connection_success": entry(
                 en="Successfully connected to {ip}:5555",
                 ru="Подключение к {ip}:5555 выполнено успешно"
             ),
-            "waiting_for_connection": Translation(
+            "waiting_for_connection": entry(
                 en="\rWaiting for connection... {remaining_time} sec.",
                 ru="\rОжидание подключения... {remaining_time} сек."
             ),
-            "connection_failed": Translation(
+            "connection_failed": entry(
                 en="Failed to connect within {timeout} seconds.",
                 ru="Не удалось подключиться в течение {timeout} секунд."
             ),
-            "ensure_steps": Translation(
+            "ensure_steps": entry(
                 en="Make sure that:\n"
                 "1. ADB debugging is enabled on your TV\n"
                 "2. Your TV and PC are on the same network\n"
@@ -173,191 +234,223 @@ arising from the use of this program.
                 "3. IP-адрес введен правильно\n"
                 "4. Вы предоставили доступ устройству при появлении запроса на ТВ"
             ),
-            "last_error": Translation(
+            "connection_state_refused": entry(
+                en="\rConnection refused, is network debugging enabled? Retrying... {remaining_time} sec.",
+                ru="\rПодключение отклонено, включена ли отладка по сети? Повтор... {remaining_time} сек."
+            ),
+            "connection_state_offline": entry(
+                en="\rDevice is not responding, retrying... {remaining_time} sec.",
+                ru="\rУстройство не отвечает, повтор... {remaining_time} сек."
+            ),
+            "connection_state_unauthorized": entry(
+                en="\rConnection was not confirmed on the TV, retrying... {remaining_time} sec.",
+                ru="\rПодключение не подтверждено на ТВ, повтор... {remaining_time} сек."
+            ),
+            "connection_hint_connecting": entry(
+                en="The device did not answer in time.",
+                ru="Устройство не ответило вовремя."
+            ),
+            "connection_hint_refused": entry(
+                en="The device refused the connection: network debugging is probably disabled.",
+                ru="Устройство отклонило подключение: вероятно, отладка по сети выключена."
+            ),
+            "connection_hint_offline": entry(
+                en="The device is offline or unreachable at this address.",
+                ru="Устройство выключено или недоступно по этому адресу."
+            ),
+            "connection_hint_unauthorized": entry(
+                en="The connection was not confirmed on the TV screen.",
+                ru="Подключение не было подтверждено на экране ТВ."
+            ),
+            "last_error": entry(
                 en="Last error: {error}",
                 ru="Последняя ошибка: {error}"
             ),
-            "no_device_connected": Translation(
+            "no_device_connected": entry(
                 en="No device connected",
                 ru="Не подключено ни к одному устройству"
             ),
-            "failed_to_get_ntp_server": Translation(
+            "failed_to_get_ntp_server": entry(
                 en="Failed to get current NTP server: {error}",
                 ru="Не удалось получить текущий сервер NTP: {error}"
             ),
-            "ntp_server_set": Translation(
+            "ntp_server_set": entry(
                 en="NTP server set to {ntp_server}",
                 ru="Сервер NTP установлен на {ntp_server}"
             ),
-            "ntp_server_confirmation_failed": Translation(
+            "ntp_server_unchanged": entry(
+                en="NTP server is already {ntp_server}, no change needed",
+                ru="Сервер NTP уже {ntp_server}, изменение не требуется"
+            ),
+            "ntp_server_confirmation_failed": entry(
                 en="Failed to confirm NTP server change.",
                 ru="Не удалось подтвердить изменение сервера NTP"
             ),
-            "ntp_server_update_failed": Translation(
+            "ntp_server_update_failed": entry(
                 en="Failed to update NTP server: {error}",
                 ru="Не удалось обновить сервер NTP: {error}"
             ),
-            "available_country_codes": Translation(
+            "available_country_codes": entry(
                 en="\nAvailable country codes:",
                 ru="\nДоступные коды стран (копируем в буфер обмена наприм. ru или by и вставляем в пункте 1 глав. меню):"
             ),
-            "country_code_server": Translation(
+            "country_code_server": entry(
                 en="{code} — {server}",
                 ru="{code} — {server}"
             ),
-            "available_alternative_ntp_servers": Translation(
+            "available_alternative_ntp_servers": entry(
                 en="\nAvailable alternative NTP servers:",
                 ru="\nДоступные альтернативные серверы времени NTP (копируем в буфер обмена наприм. 1.asia.pool.ntp.org и вставляем в пункте 2 глав. меню):"
             ),
-            "custom_ntp_server": Translation(
+            "custom_ntp_server": entry(
                 en="- {server}",
                 ru="- {server}"
             ),
-            "enter_ntp_server": Translation(
+            "enter_ntp_server": entry(
                 en="\nEnter your NTP server (or 'q' to quit): ",
                 ru="\nВведите свой NTP-сервер (или 'q' для выхода): "
             ),
-            "device_info_error": Translation(
+            "device_info_error": entry(
                 en="Failed to retrieve device information: {error}",
                 ru="Не удалось получить информацию об устройстве: {error}"
             ),
-            "current_ntp_server": Translation(
+            "current_ntp_server": entry(
                 en="- Current NTP time server set on the device: ",
                 ru="- Текущий сервер времени, установленный на устройстве: "
             ),
-            "ntp_server_info_error": Translation(
+            "ntp_server_info_error": entry(
                 en="Failed to retrieve NTP server information: {error}",
                 ru="Не удалось получить информацию о сервере NTP: {error}"
             ),
-            "select_language": Translation(
+            "select_language": entry(
                 en="Select language:",
                 ru="Выберите язык:"
             ),
-            "english": Translation(
+            "english": entry(
                 en="English",
                 ru="Английский"
             ),
-            "russian": Translation(
+            "russian": entry(
                 en="Russian",
                 ru="Русский"
             ),
-            "enter_number": Translation(
+            "enter_number": entry(
                 en="Enter number:",
                 ru="Введите номер:"
             ),
-            "language_set_en": Translation(
+            "language_set_en": entry(
                 en="Language set to English.",
                 ru="Язык установлен на английский."
             ),
-            "language_set_ru": Translation(
+            "language_set_ru": entry(
                 en="Language set to Russian.",
                 ru="Язык установлен русский."
             ),
-            "server_management": Translation(
+            "server_management": entry(
                 en="Server Management:",
                 ru="Управление серверами:"
             ),
-            "show_favorite_servers": Translation(
+            "show_favorite_servers": entry(
                 en="Show favorite servers",
                 ru="Показать избранные серверы"
             ),
-            "add_current_server_to_favorites": Translation(
+            "add_current_server_to_favorites": entry(
                 en="Add current server to favorites",
                 ru="Добавить текущий сервер в избранное"
             ),
-            "copy_server_to_clipboard": Translation(
+            "copy_server_to_clipboard": entry(
                 en="Copy server to clipboard",
                 ru="Копировать сервер в буфер обмена"
             ),
-            "paste_server_from_clipboard": Translation(
+            "paste_server_from_clipboard": entry(
                 en="Paste server from clipboard",
                 ru="Вставить сервер из буфера обмена"
             ),
-            "remove_server_from_favorites": Translation(
+            "remove_server_from_favorites": entry(
                 en="Remove server from favorites",
                 ru="Удалить сервер из избранного"
             ),
-            "return_to_main_menu": Translation(
+            "return_to_main_menu": entry(
                 en="Return to main menu",
                 ru="Вернуться в главное меню"
             ),
-            "select_action": Translation(
+            "select_action": entry(
                 en="Select action:",
                 ru="Выберите действие:"
             ),
-            "favorite_servers_list": Translation(
+            "favorite_servers_list": entry(
                 en="Favorite servers:",
                 ru="Избранные серверы:"
             ),
-            "no_favorite_servers": Translation(
+            "no_favorite_servers": entry(
                 en="No favorite servers in the list.",
                 ru="Список избранных серверов пуст."
             ),
-            "server_added_to_favorites": Translation(
+            "server_added_to_favorites": entry(
                 en="Server {server} added to favorites",
                 ru="Сервер {server} добавлен в избранное"
             ),
-            "connect_device_first": Translation(
+            "connect_device_first": entry(
                 en="Please connect to a device first",
                 ru="Сначала подключитесь к устройству"
             ),
-            "server_copied_to_clipboard": Translation(
+            "server_copied_to_clipboard": entry(
                 en="Server {server} copied to clipboard",
                 ru="Сервер {server} скопирован в буфер обмена"
             ),
-            "failed_to_copy_server": Translation(
+            "failed_to_copy_server": entry(
                 en="Failed to copy server",
                 ru="Не удалось скопировать сервер"
             ),
-            "server_set_from_clipboard": Translation(
+            "server_set_from_clipboard": entry(
                 en="Server {server} set from clipboard",
                 ru="Установлен сервер из буфера обмена: {server}"
             ),
-            "error_occurred": Translation(
+            "error_occurred": entry(
                 en="Error: {error}",
                 ru="Ошибка: {error}"
             ),
-            "clipboard_empty_or_unavailable": Translation(
+            "clipboard_empty_or_unavailable": entry(
                 en="Clipboard is empty or unavailable",
                 ru="Буфер обмена пуст или недоступен"
             ),
-            "choose_server_to_remove": Translation(
+            "choose_server_to_remove": entry(
                 en="Choose a server to remove:",
                 ru="Выберите сервер для удаления:"
             ),
-            "enter_server_number": Translation(
+            "enter_server_number": entry(
                 en="Enter server number:",
                 ru="Введите номер сервера:"
             ),
-            "server_removed_from_favorites": Translation(
+            "server_removed_from_favorites": entry(
                 en="Server {server} removed from favorites",
                 ru="Сервер {server} удален из избранного"
             ),
-            "invalid_number": Translation(
+            "invalid_number": entry(
                 en="Invalid number",
                 ru="Неверный номер"
             ),
-            "enter_valid_number": Translation(
+            "enter_valid_number": entry(
                 en="Please enter a valid number",
                 ru="Введите корректный номер"
             ),
-            "no_favorite_servers": Translation(
+            "no_favorite_servers": entry(
                 en="No favorite servers in the list",
                 ru="Список избранных серверов пуст"
             ),
-            "invalid_choice": Translation(
+            "invalid_choice": entry(
                 en="Invalid choice",
                 ru="Неверный выбор"
             ),
-            "menu_item_9": Translation(
+            "menu_item_9": entry(
                  en="8. Terminal mode (ADB and system commands)",
                  ru="8. Режим терминала (команды ADB и системные)"
             ),
-            "terminal_mode_welcome": Translation(
+            "terminal_mode_welcome": entry(
                  en="Terminal mode activated. Type 'help', 'adb --help' for available commands or 'exit' to quit.",
                  ru="Режим терминала активирован. Введите 'help', 'adb --help' для списка команд или 'exit' для выхода."
             ),
-            "terminal_mode_help": Translation(
+            "terminal_mode_help": entry(
                  en="\nYou can execute any ADB or system commands."
                  "\nBefore running commands in the terminal, you must connect to the device 'adb connect <ip>:<port>'"
                  "\nAvoid Cyrillic and spaces in file paths or use quotes",
@@ -365,7 +458,7 @@ arising from the use of this program.
                  "\nПрежде чем выполнять команды в терминале необходимо подключиться к устройству 'adb connect <ip>:<port>'"
                  "\nИзбегайте кириллицы и пробелов в путях к файлам или используйте кавычки"
             ),
-            "terminal_mode_commands": Translation(
+            "terminal_mode_commands": entry(
                  en="""Available commands:
                     - Any ADB command (e.g., 'adb devices', 'adb shell')
                     - System commands
@@ -694,134 +787,134 @@ arising from the use of this program.
                     adb unroot
                         Перезапустить ADB в обычном режиме."""
             ),
-            "terminal_mode_exit_ctrl_c": Translation(
+            "terminal_mode_exit_ctrl_c": entry(
                  en="Terminal mode deactivated.",
                  ru="Режим терминала деактивирован."
             ),
-            "terminal_mode_error": Translation(
+            "terminal_mode_error": entry(
                  en="Error executing command: {error}",
                  ru="Ошибка выполнения команды: {error}"
             ),
-            "command_error": Translation(
+            "command_error": entry(
                  en="Command execution failed",
                  ru="Ошибка выполнения команды"
             ),
-            "command_execution_error": Translation(
+            "command_execution_error": entry(
                  en="Error executing command: {error}",
                  ru="Ошибка выполнения команды: {error}"
             ),
                 
             # Main menu items
-            "main_menu": Translation(
+            "main_menu": entry(
                 en="\nMain Menu:",
                 ru="\nГлавное меню:"
             ),
-            "menu_item_1": Translation(
+            "menu_item_1": entry(
                 en="1. Change NTP time server by country code",
                 ru="1. Изменить сервер времени NTP по коду страны"
             ),
-            "menu_item_2": Translation(
+            "menu_item_2": entry(
                 en="2. Change NTP time server to custom",
                 ru="2. Изменить сервер времени NTP на пользовательский"
             ),
-            "menu_item_3": Translation(
+            "menu_item_3": entry(
                 en="3. Show available country codes and NTP servers (can be copied to clipboard)",
                 ru="3. Показать доступные коды стран и серверов NTP (можно копировать в буфер обмена)"
             ),
-            "menu_item_4": Translation(
+            "menu_item_4": entry(
                 en="4. Show available alternative NTP servers (can be copied to clipboard)",
                 ru="4. Показать доступные альтернативные сервера времени NTP (можно копировать в буфер обмена)"
             ),
-            "menu_item_5": Translation(
+            "menu_item_5": entry(
                 en="5. Show current device information",
                 ru="5. Показать текущую информацию об устройстве"
             ),
-            "menu_item_6": Translation(
+            "menu_item_6": entry(
                 en="6. Server management",
                 ru="6. Управление серверами"
             ),
-            "menu_item_8": Translation(
+            "menu_item_8": entry(
                 en="7. Country codes explanation (can be copied to clipboard)",
                 ru="7. Расшифровка кодов стран (можно копировать в буфер обмена)"
             ),
-            "menu_item_10": Translation(
+            "menu_item_10": entry(
                 en="9. Exit",
                 ru="9. Выход"
             ),
-            "menu_prompt": Translation(
+            "menu_prompt": entry(
                 en="Enter menu option number:",
                 ru="Введите номер пункта меню:"
             ),
-            "enter_device_ip": Translation(
+            "enter_device_ip": entry(
                 en="Enter the IP address of your device (TV, Nvidia Shield) (find it in Settings > Network and Internet): ",
                 ru="Введите IP-адрес вашего устройства (ТВ, Nvidia Shield) (найдите в Настройки > Сеть и интернет): "
             ),
-            "invalid_ip_format": Translation(
+            "invalid_ip_format": entry(
                 en="Invalid IP address format. Use the format: xxx.xxx.xxx.xxx",
                 ru="Неверный формат IP-адреса. Используйте формат: xxx.xxx.xxx.xxx"
             ),
-            "enter_country_code": Translation(
+            "enter_country_code": entry(
                 en="Enter your country code (e.g. us for USA, uk for United Kingdom, see country codes menu, q to exit): ",
                 ru="Введите код вашей страны (например, ru для России, by для Беларуси, смотри в меню коды стран, для возврата q): "
             ),
-            "time_settings_updated": Translation(
+            "time_settings_updated": entry(
                 en="Time settings updated successfully!",
                 ru="Настройки времени успешно обновлены!"
             ),
-            "invalid_country_code": Translation(
+            "invalid_country_code": entry(
                 en="Invalid country code",
                 ru="Недействительный код страны"
             ),
 
-            "ping_ntp_servers_start": Translation(
+            "ping_ntp_servers_start": entry(
                 en="Starting NTP server connectivity check...",
                 ru="Начинаю проверку связи с NTP-серверами..."
             ),
             
-            "ntp_server_reachable": Translation(
+            "ntp_server_reachable": entry(
                 en="NTP server is reachable",
                 ru="NTP-сервер доступен"
             ),
             
-            "ntp_server_unreachable": Translation(
+            "ntp_server_unreachable": entry(
                 en="NTP server is unreachable",
                 ru="NTP-сервер недоступен"
             ),
 
-            "connection_error": Translation(
+            "connection_error": entry(
                 en="Connection error occurred",
                 ru="Произошла ошибка подключения"
             ),
 
-            "ping_servers": Translation(
+            "ping_servers": entry(
                 en="6. Ping NTP Servers",
                 ru="6. Пинговать NTP-серверы"
             ),
 
-            "ping_ntp_servers_start": Translation(
+            "ping_ntp_servers_start": entry(
                 en="Checking NTP server connectivity (may take time)...",
                 ru="Проверка доступности NTP-серверов (может занять время)..."
             ),
             
             # Setup instructions
-            "adb_setup": Translation(
+            "adb_setup": entry(
                 en="1. Enable ADB debugging on your TV or Nvidia Shield:",
                 ru="1. Включите отладку ADB на вашем ТВ или Nvidia Shield:"
             ),
-            "adb_steps": Translation(
+            "adb_steps": entry(
                 en="   Settings > Device Preferences > About > Build (press 7 times or more)",
                 ru="   Настройки > Настройки устройства > Об устройстве > Сборка (нажмите 7 раз или более)"
             ),
-            "adb_network": Translation(
+            "adb_network": entry(
                 en="   Then: Device Preferences > Developer options > Network debugging (Enable)",
                 ru="   Затем: Настройки устройства > Для разработчиков > Отладка по сети (Включить)"
             ),
 
-            "country_codes_description": Translation(
+            "country_codes_description": entry(
                 en="\nCountry code decryption (can be copied to clipboard):",
                 ru="\nРасшифровка кодов стран (копируем в буфер обмена наприм. ru и вставляем в пункте 1 глав. меню):"
             ),
-            "country_codes": Translation(
+            "country_codes": entry(
                 en="""
 at: Austria
 ba: Bosnia and Herzegovina
@@ -988,26 +1081,202 @@ vn: Вьетнам
 
 """
             ),
-            "exit_message": Translation(
+            "exit_message": entry(
                 en="\nExiting the program...",
                 ru="\nВыход из программы..."
             ),
-            "invalid_choice": Translation(
+            "invalid_choice": entry(
                 en="Invalid choice. Please try again.",
                 ru="Неверный выбор. Пожалуйста, попробуйте еще раз."
             ),
-            "error_message": Translation(
+            "error_message": entry(
                 en="Error: {}",
                 ru="Ошибка: {}"
             ),
-            "unexpected_error": Translation(
+            "unexpected_error": entry(
                 en="\nUnexpected error: {}",
                 ru="\nНепредвиденная ошибка: {}"
             ),
-            "operation_aborted": Translation(
+            "operation_aborted": entry(
                 en="\nOperation aborted by user",
                 ru="\nОперация отменена пользователем"
             ),
+
+            "cached_server_suggestion": entry(
+                en="The last NTP check ({minutes} min ago) found a faster reachable server: {server} ({rtt} ms). Use it instead? (y/n): ",
+                ru="Последняя проверка NTP ({minutes} мин назад) нашла более быстрый доступный сервер: {server} ({rtt} мс). Использовать его? (y/n): "
+            ),
+
+            "menu_item_device_probe": entry(
+                en="12. Ping NTP servers from the TV itself (device network)",
+                ru="12. Проверить NTP-серверы с самого ТВ (сеть устройства)"
+            ),
+            "ping_ntp_servers_from_device_start": entry(
+                en="Checking NTP servers from the device (may take some time)...",
+                ru="Проверка NTP-серверов с устройства (может занять время)..."
+            ),
+            "device_probe_unsupported": entry(
+                en="The device has no 'nc' tool, NTP check from the device is not possible.",
+                ru="На устройстве нет утилиты 'nc', проверка NTP с устройства невозможна."
+            ),
+            "device_probe_error": entry(
+                en="NTP check from the device failed: {error}",
+                ru="Ошибка проверки NTP с устройства: {error}"
+            ),
+
+            # Fleet mode
+            "menu_item_fleet": entry(
+                en="10. Fleet mode: set NTP server on many devices at once",
+                ru="10. Режим парка: установить сервер NTP на многих устройствах сразу"
+            ),
+            "fleet_enter_ips": entry(
+                en="Enter device IP addresses separated by commas or spaces, or a path to a file with the list: ",
+                ru="Введите IP-адреса устройств через запятую или пробел, либо путь к файлу со списком: "
+            ),
+            "fleet_invalid_ip": entry(
+                en="Skipping invalid IP address: {ip}",
+                ru="Пропущен неверный IP-адрес: {ip}"
+            ),
+            "fleet_no_valid_ips": entry(
+                en="No valid IP addresses entered.",
+                ru="Не введено ни одного корректного IP-адреса."
+            ),
+            "fleet_enter_target": entry(
+                en="Enter a country code or an NTP server address: ",
+                ru="Введите код страны или адрес сервера NTP: "
+            ),
+            "fleet_started": entry(
+                en="Setting NTP server {ntp_server} on {count} devices...",
+                ru="Установка сервера NTP {ntp_server} на {count} устройствах..."
+            ),
+            "fleet_progress": entry(
+                en="[{done}/{total}] {ip}: {status}",
+                ru="[{done}/{total}] {ip}: {status}"
+            ),
+            "fleet_summary": entry(
+                en="\nDone: {succeeded} succeeded, {failed} failed.",
+                ru="\nГотово: успешно {succeeded}, с ошибкой {failed}."
+            ),
+            "fleet_report_saved": entry(
+                en="Report saved to {path}",
+                ru="Отчет сохранен в {path}"
+            ),
+            "fleet_report_save_error": entry(
+                en="Failed to save fleet report: {error}",
+                ru="Не удалось сохранить отчет: {error}"
+            ),
+
+            # Device discovery
+            "menu_item_discover": entry(
+                en="11. Find devices with ADB debugging on the network",
+                ru="11. Найти устройства с отладкой ADB в сети"
+            ),
+            "discover_enter_networks": entry(
+                en="Enter networks to scan in CIDR form, e.g. 192.168.1.0/24 (Enter - this PC's network): ",
+                ru="Введите подсети для поиска в формате CIDR, например 192.168.1.0/24 (Enter - сеть этого ПК): "
+            ),
+            "discover_invalid_network": entry(
+                en="Skipping invalid network: {network}",
+                ru="Пропущена неверная подсеть: {network}"
+            ),
+            "discover_no_networks": entry(
+                en="No networks to scan.",
+                ru="Нет подсетей для поиска."
+            ),
+            "discover_started": entry(
+                en="Scanning {networks} for ADB port 5555...",
+                ru="Поиск порта ADB 5555 в {networks}..."
+            ),
+            "discover_found_none": entry(
+                en="No devices with ADB debugging found.",
+                ru="Устройства с отладкой ADB не найдены."
+            ),
+            "discover_found": entry(
+                en="Devices found: {count}",
+                ru="Найдено устройств: {count}"
+            ),
+            "discover_choose_action": entry(
+                en="Enter a device number to connect, 'f' for fleet mode with all found devices, or Enter to return: ",
+                ru="Введите номер устройства для подключения, 'f' - режим парка для всех найденных, Enter - возврат: "
+            ),
+
+            # Logcat capture
+            "menu_item_logcat": entry(
+                en="13. Capture time/NTP events from logcat to compressed files",
+                ru="13. Записать события времени/NTP из logcat в сжатые файлы"
+            ),
+            "logcat_started": entry(
+                en="Capturing logcat (tags: {tags}) to {path}. Press Ctrl+C to stop.",
+                ru="Запись logcat (теги: {tags}) в {path}. Нажмите Ctrl+C для остановки."
+            ),
+            "logcat_all_tags": entry(
+                en="all",
+                ru="все"
+            ),
+            "logcat_stopped": entry(
+                en="Capture stopped: {matched} of {lines} lines saved to {files} file(s).",
+                ru="Запись остановлена: сохранено {matched} из {lines} строк в {files} файл(ов)."
+            ),
+            "logcat_error": entry(
+                en="Logcat capture error: {error}",
+                ru="Ошибка записи logcat: {error}"
+            ),
+
+            # Clock drift monitoring
+            "menu_item_drift": entry(
+                en="14. Monitor clock drift on devices",
+                ru="14. Мониторинг расхождения часов на устройствах"
+            ),
+            "drift_enter_interval": entry(
+                en="Sampling interval per device in seconds (Enter - {default}): ",
+                ru="Интервал измерений для каждого устройства в секундах (Enter - {default}): "
+            ),
+            "drift_enter_threshold": entry(
+                en="Alert threshold in milliseconds (Enter - {default}): ",
+                ru="Порог предупреждения в миллисекундах (Enter - {default}): "
+            ),
+            "drift_invalid_number": entry(
+                en="Invalid number, using the default value.",
+                ru="Неверное число, используется значение по умолчанию."
+            ),
+            "drift_started": entry(
+                en="Monitoring {count} devices, recording to {path}. Press Ctrl+C to stop.",
+                ru="Мониторинг {count} устройств, запись в {path}. Нажмите Ctrl+C для остановки."
+            ),
+            "drift_stopped": entry(
+                en="Clock drift monitoring stopped.",
+                ru="Мониторинг расхождения часов остановлен."
+            ),
+
+            # Inventory rollout
+            "menu_item_rollout": entry(
+                en="15. Set NTP servers from an inventory file (CSV/YAML)",
+                ru="15. Установить серверы NTP по файлу инвентаризации (CSV/YAML)"
+            ),
+            "inventory_enter_path": entry(
+                en="Enter the path to the inventory file (columns: ip, port, ntp_server, country): ",
+                ru="Введите путь к файлу инвентаризации (колонки: ip, port, ntp_server, country): "
+            ),
+            "inventory_not_found": entry(
+                en="File not found: {path}",
+                ru="Файл не найден: {path}"
+            ),
+            "inventory_load_error": entry(
+                en="Failed to read the inventory: {error}",
+                ru="Не удалось прочитать инвентаризацию: {error}"
+            ),
+            "inventory_yaml_unavailable": entry(
+                en="YAML inventories require the PyYAML package (pip install pyyaml); use CSV instead.",
+                ru="Для YAML нужен пакет PyYAML (pip install pyyaml); используйте CSV."
+            ),
+            "inventory_invalid_row": entry(
+                en="Skipping invalid inventory row {row}",
+                ru="Пропущена неверная строка инвентаризации {row}"
+            ),
+            "inventory_started": entry(
+                en="Processing {count} devices, results are written to {path} as they finish...",
+                ru="Обработка {count} устройств, результаты записываются в {path} по мере готовности..."
+            ),
         }
 
     def set_language(self, language: Language) -> None:
@@ -1019,12 +1288,31 @@ vn: Вьетнам
         Get translation for the given key in current language
         Supports format string parameters through kwargs
         """
-        translation = self.translations.get(key)
-        if not translation:
+        catalog = self._catalogs.get(self.current_language)
+        if catalog is None:
+            catalog = self._load_catalog(self.current_language)
+
+        template = catalog.get(key)
+        if template is None:
             return f"Missing translation: {key}"
-        
-        text = getattr(translation, self.current_language.name.lower())
-        return text.format(**kwargs) if kwargs else text
+
+        text, rendered, parts = template
+        if not kwargs:
+            return text
+        if parts is None:
+            return text.format(**kwargs)
+        if not parts:
+            return rendered
+
+        chunks = []
+        for literal, field_name, format_spec, conversion in parts:
+            chunks.append(literal)
+            if field_name is not None:
+                value = kwargs[field_name]
+                if conversion:
+                    value = _CONVERSIONS[conversion](value)
+                chunks.append(format(value, format_spec))
+        return ''.join(chunks)
 
 # Create global instance
 locales = Locales()
@@ -1033,7 +1321,6 @@ locales = Locales()
 def show_disclaimer():
     print(locales.get('disclaimer'))
 
-# Example of setting language and showing the disclaimer
 def set_language(language_code: str) -> None:
     """Helper function to set language by code ('en' or 'ru')"""
     try:
@@ -1041,10 +1328,3 @@ def set_language(language_code: str) -> None:
         locales.set_language(language)
     except KeyError:
         print(f"Unsupported language code: {language_code}")
-
-# Example usage
-set_language('RU')  # Set language to Russian
-show_disclaimer()   # Display disclaimer in Russian
-
-set_language('EN')  # Set language to English
-show_disclaimer()   # Display disclaimer in English
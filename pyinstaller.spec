@@ -44,6 +44,7 @@ packages = [
     'subprocess', 
     'threading', 
     'adb_shell.adb_device', 
+    'adb_shell.adb_device_async',
     'adb_shell.auth.sign_pythonrsa',
     'ntplib', 
     'psutil'
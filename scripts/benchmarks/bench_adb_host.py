@@ -0,0 +1,74 @@
+"""
+Сравнение задержки команд ADB: процесс adb против клиента протокола
+сервера ADB (ADBHostClient, localhost:5037).
+
+Сервер ADB должен быть запущен. Для shell нужен подключенный --serial.
+
+Запуск из корня проекта:
+    python scripts/benchmarks/bench_adb_host.py [--adb adb] [--serial 192.168.1.20:5555] [--iterations 50]
+"""
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+from android_time_fixer import ADBHostClient
+
+
+def measure(func, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'mean_ms': statistics.mean(samples),
+        'median_ms': statistics.median(samples),
+        'p95_ms': sorted(samples)[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--adb', default='adb', help='Путь к исполняемому файлу adb')
+    parser.add_argument('--serial', help='Устройство для сравнения shell-команды')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    client = ADBHostClient()
+    try:
+        client.version()
+    except OSError as e:
+        sys.exit(f"ADB server is not running on port {client.port}: {e}")
+
+    cases = [
+        ('devices',
+         lambda: subprocess.run([args.adb, 'devices'], capture_output=True, check=True),
+         client.devices),
+    ]
+    if args.serial:
+        cases.append((
+            'shell echo ok',
+            lambda: subprocess.run([args.adb, '-s', args.serial, 'shell', 'echo', 'ok'],
+                                   capture_output=True, check=True),
+            lambda: client.shell('echo ok', serial=args.serial),
+        ))
+
+    print(f"{'Command':<15} {'Path':<10} {'Mean (ms)':>10} {'Median (ms)':>12} {'p95 (ms)':>10}")
+    print("-" * 61)
+    for name, via_process, via_client in cases:
+        for path, func in (('process', via_process), ('native', via_client)):
+            result = measure(func, args.iterations)
+            print(
+                f"{name:<15} {path:<10} {result['mean_ms']:>10.3f} "
+                f"{result['median_ms']:>12.3f} {result['p95_ms']:>10.3f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Пропускная способность locales.get(): скомпилированные каталоги против
+прежнего поиска через getattr + str.format.
+
+Запуск из корня проекта:
+    python scripts/benchmarks/bench_locales.py [--number 200000]
+"""
+import sys
+import time
+import timeit
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from locales import Locales
+
+
+def legacy_get(instance: Locales, key: str, **kwargs) -> str:
+    """Прежняя реализация Locales.get для сравнения"""
+    translation = instance.translations.get(key)
+    if not translation:
+        return f"Missing translation: {key}"
+    text = getattr(translation, instance.current_language.name.lower())
+    return text.format(**kwargs) if kwargs else text
+
+
+CASES = [
+    ('no params', 'enter_number', {}),
+    ('one param', 'copy_to_clipboard', {'error': 'timeout'}),
+    ('four params', 'fleet_progress', {'done': 12, 'total': 40, 'ip': '192.168.1.20', 'status': 'OK'}),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=200000)
+    args = parser.parse_args()
+
+    instance = Locales()
+    start = time.perf_counter()
+    instance.get('enter_number')
+    print(f"First get (build + compile catalog): {(time.perf_counter() - start) * 1000:.2f} ms")
+    print()
+
+    print(f"{'Case':<15} {'Legacy (M/s)':>13} {'Compiled (M/s)':>15} {'Speedup':>8}")
+    print("-" * 54)
+    for name, key, kwargs in CASES:
+        if key not in instance.translations:
+            print(f"{name:<15} missing key: {key}")
+            continue
+        legacy = min(timeit.repeat(lambda: legacy_get(instance, key, **kwargs), number=args.number, repeat=3))
+        compiled = min(timeit.repeat(lambda: instance.get(key, **kwargs), number=args.number, repeat=3))
+        print(
+            f"{name:<15} {args.number / legacy / 1e6:>13.2f} "
+            f"{args.number / compiled / 1e6:>15.2f} {legacy / compiled:>7.2f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
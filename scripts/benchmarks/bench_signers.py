@@ -0,0 +1,71 @@
+"""
+Сравнение задержки RSA-подписи ADB для разных backend'ов.
+
+Запуск из корня проекта:
+    python scripts/benchmarks/bench_signers.py [--iterations 200]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+from adb_shell.auth.keygen import keygen
+from android_time_fixer import SIGNER_BACKENDS
+
+
+def bench_backend(factory, pub: bytes, priv: bytes, iterations: int) -> dict:
+    start = time.perf_counter()
+    signer = factory(pub, priv)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # Токен ADB AUTH - 20 байт, подписывается как готовый SHA-1 хэш
+    token = os.urandom(20)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        signer.Sign(token)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'load_ms': load_ms,
+        'mean_ms': statistics.mean(samples),
+        'median_ms': statistics.median(samples),
+        'p95_ms': sorted(samples)[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        key_path = os.path.join(tmp, 'adbkey')
+        keygen(key_path)
+        with open(key_path + '.pub', 'rb') as f:
+            pub = f.read()
+        with open(key_path, 'rb') as f:
+            priv = f.read()
+
+    print(f"{'Backend':<15} {'Load (ms)':>10} {'Mean (ms)':>10} {'Median (ms)':>12} {'p95 (ms)':>10}")
+    print("-" * 61)
+    for name, factory in SIGNER_BACKENDS.items():
+        try:
+            result = bench_backend(factory, pub, priv, args.iterations)
+        except ImportError as e:
+            print(f"{name:<15} unavailable: {e}")
+            continue
+        print(
+            f"{name:<15} {result['load_ms']:>10.3f} {result['mean_ms']:>10.3f} "
+            f"{result['median_ms']:>12.3f} {result['p95_ms']:>10.3f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Замер времени запуска: разбивка импорта по модулям (-X importtime)
+и время до первого запроса ввода (выбор языка).
+
+Запуск из корня проекта:
+    python scripts/benchmarks/bench_startup.py [--runs 5] [--top 15]
+    python scripts/benchmarks/bench_startup.py --exe dist/AndroidTVTimeFixer
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+SRC = ROOT / 'src'
+
+sys.path.insert(0, str(ROOT))
+from locales import Language, locales
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([str(SRC), str(ROOT), env.get('PYTHONPATH', '')])
+    env['PYTHONUNBUFFERED'] = '1'
+    return env
+
+
+def import_breakdown(top: int) -> None:
+    """Печатает модули верхнего уровня с наибольшим кумулятивным временем импорта"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import android_time_fixer'],
+        capture_output=True,
+        text=True,
+        env=_env(),
+        cwd=str(ROOT)
+    )
+
+    rows = []
+    total_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        head, cumulative_us, name = line.split('|')
+        self_us = int(head.split(':')[1])
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if name == 'android_time_fixer':
+            total_us = int(cumulative_us)
+        elif depth == 1:
+            rows.append((int(cumulative_us), self_us, name))
+
+    rows.sort(reverse=True)
+    print(f"{'Module':<40} {'Self (ms)':>10} {'Cumulative (ms)':>16}")
+    print("-" * 68)
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"{name:<40} {self_us / 1000:>10.2f} {cumulative_us / 1000:>16.2f}")
+    if total_us is not None:
+        print(f"{'android_time_fixer (total)':<40} {'':>10} {total_us / 1000:>16.2f}")
+    elif result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1])
+
+
+def time_to_first_prompt(command: list, timeout: float) -> float:
+    """Запускает программу и ждет появления запроса выбора языка"""
+    prompts = [getattr(locales.translations['enter_number'], lang.name.lower()) for lang in Language]
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=_env(),
+        cwd=str(ROOT)
+    )
+    output = b''
+    try:
+        while time.perf_counter() - start < timeout:
+            chunk = process.stdout.read1(4096)
+            if not chunk:
+                break
+            output += chunk
+            text = output.decode('utf-8', errors='replace')
+            if any(prompt in text for prompt in prompts):
+                return time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+    raise RuntimeError(f"Prompt not seen, output: {output.decode('utf-8', errors='replace')[-300:]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--exe', help='Путь к собранному бинарнику вместо запуска из исходников')
+    args = parser.parse_args()
+
+    print("Import time breakdown (-X importtime):\n")
+    import_breakdown(args.top)
+
+    command = [args.exe] if args.exe else [sys.executable, str(SRC / 'android_time_fixer.py')]
+    samples = [time_to_first_prompt(command, args.timeout) * 1000 for _ in range(args.runs)]
+    print(f"\nTime to first prompt over {args.runs} runs: "
+          f"median {statistics.median(samples):.1f} ms, min {min(samples):.1f} ms, max {max(samples):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
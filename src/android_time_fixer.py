@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import os
 import sys
 import re
@@ -7,28 +9,39 @@ import time
 import logging
 import platform
 import json
-import psutil
+import uuid
+import ipaddress
+import threading
 import atexit
 import signal
 import subprocess
 from subprocess import Popen, PIPE
 from pathlib import Path
-from typing import Optional, Tuple
-import ntplib
-import pyperclip
+from enum import Enum
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 import colorama
 from colorama import Fore, Style, init
-from adb_shell.auth.keygen import keygen
-from adb_shell.adb_device import AdbDeviceTcp
-from adb_shell.auth.sign_pythonrsa import PythonRSASigner
 sys.path.append(str(Path(__file__).parent))
-from locales import locales, set_language
+from locales import locales, set_language, show_disclaimer
 init(autoreset=True)
 
-try:
-    import wmi
-except ImportError:
-    wmi = None
+# Тяжелые модули (adb_shell, cryptography, ntplib, pyperclip, psutil, wmi, asyncio)
+# импортируются при первом использовании, чтобы ускорить запуск программы
+if TYPE_CHECKING:
+    # Только для аннотаций: во время выполнения модули импортируются лениво
+    import asyncio
+    from adb_shell.adb_device import AdbDeviceTcp
+    from adb_shell.adb_device_async import AdbDeviceTcpAsync
+
+def _import_wmi():
+    """Возвращает модуль wmi или None, если он недоступен (не Windows)"""
+    try:
+        import wmi
+        return wmi
+    except ImportError:
+        return None
 
 # Настройка логирования
 #logging.basicConfig(
@@ -55,10 +68,14 @@ for handler in logging.getLogger().handlers:
 logger = logging.getLogger(__name__)
 
 class ADBProcessManager:
-    def __init__(self, adb_path, device_ip=None):
+    def __init__(self, adb_path, device_ip=None, shutdown_deadline: float = 5.0):
         self.adb_path = adb_path
         self.device_ip = device_ip
+        self.shutdown_deadline = shutdown_deadline  # Общий лимит на завершение ADB, сек
         self.logger = logging.getLogger(__name__)
+        # Завершение выполняется один раз: выход из меню, обработчик сигнала и atexit
+        # вызывают его последовательно, и каждый проход занял бы свой дедлайн
+        self._terminated = False
         self.setup_process_termination()
 
     def setup_process_termination(self):
@@ -87,10 +104,7 @@ class ADBProcessManager:
             self.logger.info(locales.get("terminal_mode_exit_ctrl_c"))
             print("\n" + Fore.YELLOW + locales.get("terminal_mode_exit_ctrl_c"))
             
-            # Сначала отключаем устройство
-            self.disconnect_device()
-            
-            # Затем завершаем процессы
+            # Отключение устройства выполняется внутри terminate_adb_processes
             self.terminate_adb_processes()
             
             sys.exit(0)
@@ -98,11 +112,11 @@ class ADBProcessManager:
             self.logger.error(f"Error in signal handler: {e}")
             sys.exit(1)
 
-    def disconnect_device(self):
+    def disconnect_device(self, timeout: float = 5):
         """
         Отключение устройства через ADB перед завершением процессов
         """
-        if not self.device_ip:
+        if not self.device_ip or timeout <= 0:
             return
 
         try:
@@ -117,7 +131,7 @@ class ADBProcessManager:
                 [self.adb_path, 'disconnect', device_address],
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
-                timeout=5
+                timeout=timeout
             )
             
             if disconnect_process.returncode == 0:
@@ -130,84 +144,145 @@ class ADBProcessManager:
         except Exception as e:
             self.logger.error(f"Error during device disconnect: {e}")
 
-    def terminate_adb_processes(self):
+    def terminate_adb_processes(self, deadline: Optional[float] = None) -> Dict[str, float]:
         """
-        Комплексный метод завершения всех процессов ADB
-        с использованием нескольких подходов
+        Завершение всех процессов ADB за один проход с общим дедлайном
+
+        Отключение устройства и kill-server выполняются один раз, затем за один
+        проход по таблице процессов всем найденным adb отправляется terminate,
+        ожидание идет под общим дедлайном, оставшиеся процессы убиваются.
+        Платформенные методы (taskkill/WMI/pkill) используются только если
+        psutil недоступен или после него остались живые процессы.
+
+        Повторные вызовы ничего не делают, пока не вызван rearm().
+
+        Args:
+            deadline: Общий лимит времени на завершение в секундах
+
+        Returns:
+            Dict[str, float]: Время каждой фазы в миллисекундах (пустой при повторном вызове)
         """
-        try:
-            # Сначала отключаем устройство
-            self.disconnect_device()
+        if self._terminated:
+            self.logger.debug("ADB shutdown already performed, skipping")
+            return {}
+        self._terminated = True
 
-            # 1. Штатное завершение через ADB
-            subprocess.run([self.adb_path, 'kill-server'], 
-                           stdout=subprocess.DEVNULL, 
-                           stderr=subprocess.DEVNULL, 
-                           timeout=5)
+        deadline_at = time.monotonic() + (self.shutdown_deadline if deadline is None else deadline)
+        timings: Dict[str, float] = {}
+
+        def remaining() -> float:
+            return deadline_at - time.monotonic()
+
+        def run_phase(name, func, *args):
+            started = time.monotonic()
+            try:
+                return func(*args)
+            finally:
+                timings[name] = (time.monotonic() - started) * 1000
+
+        run_phase('disconnect', self.disconnect_device, min(remaining(), 2))
+        run_phase('kill_server', self._kill_server, min(remaining(), 3))
+        survivors = run_phase('psutil', self._terminate_via_psutil, remaining)
+
+        if survivors and remaining() > 0:
+            if sys.platform == 'win32':
+                run_phase('fallback', self._terminate_windows_processes, remaining())
+            else:
+                run_phase('fallback', self._terminate_unix_processes, remaining())
+
+        timings['total'] = sum(timings.values())
+        breakdown = ", ".join(f"{name}: {ms:.0f} ms" for name, ms in timings.items() if name != 'total')
+        self.logger.info(f"ADB shutdown finished in {timings['total']:.0f} ms ({breakdown})")
+        return timings
+
+    def rearm(self) -> None:
+        """Разрешает новое завершение ADB после повторного запуска сервера"""
+        self._terminated = False
+
+    def _kill_server(self, timeout: float):
+        """Штатная остановка сервера ADB через 'adb kill-server'"""
+        if timeout <= 0:
+            self.logger.warning("Skipping ADB kill-server: shutdown deadline reached")
+            return
+
+        try:
+            subprocess.run([self.adb_path, 'kill-server'],
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL,
+                           timeout=timeout)
             self.logger.info("ADB kill-server executed successfully")
         except subprocess.TimeoutExpired:
             self.logger.warning("ADB kill-server timed out")
+        except Exception as e:
+            self.logger.error(f"Error executing ADB kill-server: {e}")
 
-        # 2. Завершение через psutil
-        psutil_terminated = self._terminate_via_psutil()
-
-        # 3. Завершение через platform-специфичные методы
-        if sys.platform == 'win32':
-            self._terminate_windows_processes()
-        else:
-            self._terminate_unix_processes()
+    def _is_adb_process(self, info: dict) -> bool:
+        """Проверка, относится ли процесс (psutil info) к ADB"""
+        name = (info.get('name') or '').lower()
+        exe = info.get('exe')
+        return name in ('adb', 'adb.exe') or bool(exe and self.adb_path and exe == self.adb_path)
 
-    def _terminate_via_psutil(self):
+    def _terminate_via_psutil(self, remaining: Callable[[], float]) -> bool:
         """
-        Завершение процессов через psutil
-        
+        Завершение процессов через psutil за один проход по таблице процессов
+
+        Args:
+            remaining: Функция, возвращающая оставшееся до дедлайна время
+
         Returns:
-            bool: Успешность завершения
+            bool: True, если нужен платформенный fallback
+                  (psutil недоступен или остались живые процессы)
         """
-        # Сначала отключаем устройство
-        self.disconnect_device()
+        try:
+            import psutil
+        except ImportError:
+            self.logger.info("psutil is not available, skipping process scan")
+            return True
 
-        terminated = False
         try:
+            own_pid = os.getpid()
+            procs = []
             for proc in psutil.process_iter(['name', 'exe']):
+                if proc.pid != own_pid and self._is_adb_process(proc.info):
+                    procs.append(proc)
+            if not procs:
+                return False
+
+            # Сигналы отправляются всем сразу, ожидание - общее
+            for proc in procs:
                 try:
-                    if (proc.info['name'] == 'adb.exe' or 
-                        (proc.info['exe'] and self.adb_path in proc.info['exe'])):
-                        
-                        # Мягкое завершение
-                        proc.terminate()
-                        
-                        # Если не завершился - принудительно
-                        try:
-                            proc.wait(timeout=3)
-                            terminated = True
-                        except psutil.TimeoutExpired:
-                            proc.kill()
-                            terminated = True
+                    proc.terminate()
                 except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                     pass
-            
-            if terminated:
-                self.logger.info("Processes terminated via psutil")
+
+            gone, alive = psutil.wait_procs(procs, timeout=max(remaining(), 0))
+            if alive:
+                for proc in alive:
+                    try:
+                        proc.kill()
+                    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                        pass
+                _, alive = psutil.wait_procs(alive, timeout=max(min(remaining(), 1), 0))
+
+            self.logger.info(
+                f"Processes terminated via psutil: {len(procs) - len(alive)} of {len(procs)}"
+            )
+            return bool(alive)
         except Exception as e:
             self.logger.error(f"Error terminating via psutil: {e}")
-        
-        return terminated
+            return True
 
-    def _terminate_windows_processes(self):
+    def _terminate_windows_processes(self, timeout: float = 5):
         """Расширенное завершение процессов ADB в Windows"""
-        # Сначала отключаем устройство
-        self.disconnect_device()
-
         try:
             # 1. Завершение через taskkill
             subprocess.run(['taskkill', '/F', '/IM', 'adb.exe'], 
                            stdout=subprocess.DEVNULL, 
                            stderr=subprocess.DEVNULL, 
-                           timeout=5)
+                           timeout=timeout)
             
             # 2. Завершение через WMI (если доступно)
-            if wmi is not None:
+            if _import_wmi() is not None:
                 self._terminate_via_wmi()
             
             self.logger.info("Windows ADB processes terminated")
@@ -221,9 +296,7 @@ class ADBProcessManager:
         Завершение процессов ADB с использованием WMI
         Работает только в Windows
         """
-        # Сначала отключаем устройство
-        self.disconnect_device()
-
+        wmi = _import_wmi()
         if wmi is None:
             self.logger.warning("WMI module not available")
             return
@@ -255,16 +328,13 @@ class ADBProcessManager:
         except Exception as e:
             self.logger.error(f"WMI termination error: {e}")
 
-    def _terminate_unix_processes(self):
+    def _terminate_unix_processes(self, timeout: float = 5):
         """Завершение процессов ADB в Unix-системах"""
-        # Сначала отключаем устройство
-        self.disconnect_device()
-
         try:
-            subprocess.run(['pkill', '-9', 'adb'], 
+            subprocess.run(['pkill', '-9', '-x', 'adb'], 
                            stdout=subprocess.DEVNULL, 
                            stderr=subprocess.DEVNULL, 
-                           timeout=5)
+                           timeout=timeout)
             self.logger.info("Unix ADB processes terminated")
         except subprocess.TimeoutExpired:
             self.logger.warning("pkill timed out")
@@ -277,9 +347,6 @@ class ADBProcessManager:
         который можно использовать при завершении программы
         """
         try:
-            # Сначала отключаем устройство
-            self.disconnect_device()
-            # Затем завершаем процессы
             self.terminate_adb_processes()
         except Exception as e:
             self.logger.error(f"Error during cleanup: {e}")
@@ -288,245 +355,1793 @@ class AndroidTVTimeFixerError(Exception):
     """Базовый класс исключений для AndroidTVTimeFixer"""
     pass
 
-class AndroidTVTimeFixer:
-    def __init__(self):
-        self.current_path = Path.cwd()
-        self.keys_folder = self.current_path / 'keys'
-        self._setup_logging()
-        self._adb_path: Optional[str] = None
-        self._adb_path = self.get_adb_path()
-        self.process_manager = ADBProcessManager(self._adb_path)
-        self.device = None
-        self.max_connection_retries = 5
-        self.connection_retry_delay = 5
-        self.connection_timeout = 120  # Таймаут ожидания подключения в секундах
-        self.servers_file = self.current_path / 'saved_servers.json'
-        self.saved_servers = self.load_saved_servers()
-        self.ntp_servers = {
-            'at': 'at.pool.ntp.org',
-            'ba': 'ba.pool.ntp.org',
-            'be': 'be.pool.ntp.org',
-            'bg': 'bg.pool.ntp.org',
-            'by': 'by.pool.ntp.org',
-            'ch': 'ch.pool.ntp.org',
-            'cy': 'cy.pool.ntp.org',
-            'cz': 'cz.pool.ntp.org',
-            'de': 'de.pool.ntp.org',
-            'dk': 'dk.pool.ntp.org',
-            'ee': 'ee.pool.ntp.org',
-            'es': 'es.pool.ntp.org',
-            'fi': 'fi.pool.ntp.org',
-            'fr': 'fr.pool.ntp.org',
-            'gi': 'gi.pool.ntp.org',
-            'gr': 'gr.pool.ntp.org',
-            'hr': 'hr.pool.ntp.org',
-            'hu': 'hu.pool.ntp.org',
-            'ie': 'ie.pool.ntp.org',
-            'is': 'is.pool.ntp.org',
-            'it': 'it.pool.ntp.org',
-            'li': 'li.pool.ntp.org',
-            'lt': 'lt.pool.ntp.org',
-            'lu': 'lu.pool.ntp.org',
-            'lv': 'lv.pool.ntp.org',
-            'md': 'md.pool.ntp.org',
-            'mk': 'mk.pool.ntp.org',
-            'nl': 'nl.pool.ntp.org',
-            'no': 'no.pool.ntp.org',
-            'pl': 'pl.pool.ntp.org',
-            'pt': 'pt.pool.ntp.org',
-            'ro': 'ro.pool.ntp.org',
-            'rs': 'rs.pool.ntp.org',
-            'ru': 'ru.pool.ntp.org',
-            'se': 'se.pool.ntp.org',
-            'si': 'si.pool.ntp.org',
-            'sk': 'sk.pool.ntp.org',
-            'tr': 'tr.pool.ntp.org',
-            'uk': 'uk.pool.ntp.org',
-            'us': 'us.pool.ntp.org',
-            'ca': 'ca.pool.ntp.org',
-            'br': 'br.pool.ntp.org',
-            'au': 'au.pool.ntp.org',
-            'jp': 'jp.pool.ntp.org',
-            'kz': 'kz.pool.ntp.org',
-            'ae': 'ae.pool.ntp.org',
-            'am': 'am.pool.ntp.org',
-            'az': 'az.pool.ntp.org',
-            'bd': 'bd.pool.ntp.org',
-            'bh': 'bh.pool.ntp.org',
-            'cn': 'cn.pool.ntp.org',
-            'ge': 'ge.pool.ntp.org',
-            'hk': 'hk.pool.ntp.org',
-            'id': 'id.pool.ntp.org',
-            'il': 'il.pool.ntp.org',
-            'in': 'in.pool.ntp.org',
-            'ir': 'ir.pool.ntp.org',
-            'jp': 'jp.pool.ntp.org',
-            'kg': 'kg.pool.ntp.org',
-            'kh': 'kh.pool.ntp.org',
-            'kr': 'kr.pool.ntp.org',
-            'kz': 'kz.pool.ntp.org',
-            'lk': 'lk.pool.ntp.org',
-            'mn': 'mn.pool.ntp.org',
-            'mv': 'mv.pool.ntp.org',
-            'my': 'my.pool.ntp.org',
-            'np': 'np.pool.ntp.org',
-            'ph': 'ph.pool.ntp.org',
-            'pk': 'pk.pool.ntp.org',
-            'ps': 'ps.pool.ntp.org',
-            'qa': 'qa.pool.ntp.org',
-            'sa': 'sa.pool.ntp.org',
-            'sg': 'sg.pool.ntp.org',
-            'th': 'th.pool.ntp.org',
-            'tj': 'tj.pool.ntp.org',
-            'tw': 'tw.pool.ntp.org',
-            'uz': 'uz.pool.ntp.org',
-            'ua': 'ua.pool.ntp.org',
-            'vn': 'vn.pool.ntp.org'
-        }
-        self.custom_ntp_servers = [
-            'time.windows.com',
-            'twc.trafficmanager.net',
-            '0.europe.pool.ntp.org',
-            '1.europe.pool.ntp.org',
-            '2.europe.pool.ntp.org',
-            '3.europe.pool.ntp.org',
-            '0.north-america.pool.ntp.org',
-            '1.north-america.pool.ntp.org',
-            '2.north-america.pool.ntp.org',
-            '3.north-america.pool.ntp.org',
-            '0.asia.pool.ntp.org',
-            '1.asia.pool.ntp.org',
-            '2.asia.pool.ntp.org',
-            '3.asia.pool.ntp.org',
-            '0.africa.pool.ntp.org',
-            '1.africa.pool.ntp.org',
-            '2.africa.pool.ntp.org',
-            '3.africa.pool.ntp.org',
-            '0.oceania.pool.ntp.org',
-            '1.oceania.pool.ntp.org',
-            '2.oceania.pool.ntp.org',
-            '3.oceania.pool.ntp.org',
-            '0.south-america.pool.ntp.org',
-            '1.south-america.pool.ntp.org',
-            '2.south-america.pool.ntp.org',
-            '3.south-america.pool.ntp.org',
-            'time.cloudflare.com',
-            'clock.isc.org',
-            'ntp2.vniiftri.ru',
-            'ntps1-1.cs.tu-berlin.de',
-            'ntp.ix.ru',
-            'time.google.com',
-            'time.android.com'
-        ]
+class ADBHostError(AndroidTVTimeFixerError):
+    """Ошибка протокола сервера ADB (ответ FAIL или обрыв соединения)"""
+    pass
 
-    def _setup_logging(self) -> None:
-        """Настраивает логирование для класса"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('android_tv_fixer.log', encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+class ADBStreamError(ADBHostError):
+    """Обрыв соединения после того, как устройство приняло shell-команду"""
+    pass
 
-    def get_adb_path(self) -> str:
-        """
-        Получает путь к ADB из runtime hook или ресурсов
-        
-        Returns:
-            str: Полный путь к исполняемому файлу ADB
-            
-        Raises:
-            FileNotFoundError: Если файл ADB не найден
-        """
-        if self._adb_path:
-            return self._adb_path
+class ADBHostClient:
+    """
+    Клиент протокола smart socket сервера ADB (localhost:5037)
 
-        try:
-            # Пытаемся импортировать из hook'ов
-            try:
-                from hooks.win_hook import ADB_PATH
-                self._adb_path = ADB_PATH
-            except ImportError:
-                from hooks.linux_hook import ADB_PATH
-                self._adb_path = ADB_PATH
-        except ImportError:
-            # Fallback для разработки
-            if getattr(sys, 'frozen', False):
-                base_path = sys._MEIPASS
-            else:
-                base_path = os.path.abspath(os.path.dirname(__file__))
-            
-            self._adb_path = os.path.join(
-                base_path, 
-                'resources', 
-                'adb.exe' if sys.platform == 'win32' else 'adb'
-            )
+    Выполняет devices, connect, disconnect и shell без запуска процесса adb.
+    Сервер закрывает соединение после каждого host-запроса, поэтому на каждую
+    команду открывается короткое соединение с localhost.
+    """
+    HOST = '127.0.0.1'
+    DEFAULT_PORT = 5037
+    READ_CHUNK = 65536
 
-        if not os.path.exists(self._adb_path):
-            raise FileNotFoundError(f"ADB не найден по пути: {self._adb_path}")
+    def __init__(self, port: Optional[int] = None, timeout: float = 5.0):
+        self.port = port or int(os.environ.get('ANDROID_ADB_SERVER_PORT', self.DEFAULT_PORT))
+        self.timeout = timeout
 
-        self.logger.info(f"Используется ADB по пути: {self._adb_path}")
-        return self._adb_path
+    def _open(self, timeout: Optional[float] = None) -> socket.socket:
+        return socket.create_connection((self.HOST, self.port), timeout=timeout or self.timeout)
+
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        data = b''
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ADBHostError("ADB server closed the connection")
+            data += chunk
+        return data
 
-    def _process_command_output(self, process: Popen) -> Tuple[int, str, str]:
+    def _read_string(self, sock: socket.socket) -> str:
+        length = int(self._recv_exact(sock, 4), 16)
+        return self._recv_exact(sock, length).decode('utf-8', errors='replace')
+
+    def _request(self, sock: socket.socket, request: str) -> None:
+        """Отправляет запрос и проверяет ответ OKAY/FAIL"""
+        payload = request.encode('utf-8')
+        sock.sendall(b'%04x' % len(payload) + payload)
+        status = self._recv_exact(sock, 4)
+        if status == b'FAIL':
+            raise ADBHostError(self._read_string(sock))
+        if status != b'OKAY':
+            raise ADBHostError(f"Unexpected ADB server response: {status!r}")
+
+    def query(self, request: str) -> str:
         """
-        Обрабатывает вывод команды и возвращает результат
-        
+        Выполняет host-запрос, возвращающий строку с префиксом длины
+
         Args:
-            process (Popen): Процесс для обработки
-            
+            request: Запрос, например 'host:devices'
+
         Returns:
-            Tuple[int, str, str]: (код возврата, stdout, stderr)
+            str: Ответ сервера
         """
-        stdout_lines = []
-        try:
-            while True:
-                output = process.stdout.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    clean_output = output.strip()
-                    if sys.platform == 'win32':
-                        try:
-                            # Пробуем декодировать как cp866 (кодировка командной строки Windows)
-                            clean_output = clean_output.encode('cp866').decode('cp866')
-                        except UnicodeEncodeError:
-                            # Если не получилось, оставляем как есть
-                            pass
-                    stdout_lines.append(clean_output)
-                    print(Fore.GREEN + clean_output)
-
-            return_code = process.poll()
-            _, stderr = process.communicate(timeout=5)
-            return return_code, '\n'.join(stdout_lines), stderr
-
-        except TimeoutError:
-            process.kill()
-            raise TimeoutError("Command execution timeout exceeded")
+        with self._open() as sock:
+            self._request(sock, request)
+            return self._read_string(sock)
 
-    def _retry_adb_connection(self, command: str, max_retries: int = 5, delay: int = 2) -> bool:
+    def version(self) -> int:
+        """Возвращает версию протокола сервера ADB"""
+        return int(self.query('host:version'), 16)
+
+    def devices(self) -> List[Tuple[str, str]]:
+        """Возвращает список (serial, state) подключенных устройств"""
+        result = []
+        for line in self.query('host:devices').splitlines():
+            if '\t' in line:
+                serial, state = line.split('\t', 1)
+                result.append((serial, state))
+        return result
+
+    def connect(self, address: str) -> str:
+        """Подключает устройство по TCP, возвращает сообщение сервера"""
+        if ':' not in address:
+            address = f"{address}:5555"
+        return self.query(f'host:connect:{address}')
+
+    def disconnect(self, address: str = '') -> str:
+        """Отключает устройство (или все TCP-устройства, если адрес не указан)"""
+        if address and ':' not in address:
+            address = f"{address}:5555"
+        return self.query(f'host:disconnect:{address}')
+
+    def shell(self, command: str, serial: Optional[str] = None,
+              on_chunk: Optional[Callable[[bytes], None]] = None) -> bytes:
         """
-        Пытается переподключиться к устройству несколько раз, выполняя 'adb kill-server' и 'adb disconnect'
-        только на 3-й, 4-й и 5-й попытке. Использует порт 5555 по умолчанию.
-    
+        Выполняет shell-команду на устройстве
+
         Args:
-            command (str): Выполняемая команда.
-            max_retries (int): Максимальное количество попыток (по умолчанию 5).
-            delay (int): Задержка между попытками в секундах (по умолчанию 2).
-    
+            command: Команда для выполнения
+            serial: Серийный номер устройства (None - единственное подключенное)
+            on_chunk: Вызывается для каждого полученного блока вывода
+
         Returns:
-            bool: True, если подключение успешно, False в противном случае.
+            bytes: Вывод команды (пустой, если задан on_chunk)
+
+        Raises:
+            ADBStreamError: Соединение оборвалось после того, как команда
+                принята: повторять ее небезопасно
+        """
+        chunks = []
+        with self._open() as sock:
+            self._request(sock, f'host:transport:{serial}' if serial else 'host:transport-any')
+            self._request(sock, f'shell:{command}')
+            # Вывод длительных команд (logcat) читается без таймаута до закрытия потока
+            sock.settimeout(None)
+            try:
+                while True:
+                    chunk = sock.recv(self.READ_CHUNK)
+                    if not chunk:
+                        break
+                    if on_chunk:
+                        on_chunk(chunk)
+                    else:
+                        chunks.append(chunk)
+            except OSError as e:
+                raise ADBStreamError(f"Connection lost while reading shell output: {e}") from e
+        return b''.join(chunks)
+
+class ADBServerSupervisor:
+    """
+    Поддерживает один запущенный сервер ADB
+
+    Состояние сервера проверяется запросом host:version к порту 5037,
+    перезапуск выполняется только если проверка не прошла
+    """
+
+    def __init__(self, adb_path: str, timeout: float = 1.0, start_timeout: float = 10.0):
+        self.adb_path = adb_path
+        self.timeout = timeout  # Таймаут проверки состояния, сек
+        self.start_timeout = start_timeout  # Таймаут запуска/остановки сервера, сек
+        self.client = ADBHostClient(timeout=timeout)
+        self.logger = logging.getLogger(__name__)
+
+    def server_version(self) -> Optional[int]:
+        """
+        Запрашивает версию у сервера ADB по протоколу smart socket
+
+        Returns:
+            Optional[int]: Версия протокола сервера или None, если сервер не отвечает
+        """
+        try:
+            return self.client.version()
+        except (OSError, ValueError, ADBHostError):
+            return None
+
+    def is_healthy(self) -> bool:
+        """Проверяет, что сервер ADB запущен и отвечает"""
+        return self.server_version() is not None
+
+    def _run(self, command: str) -> bool:
+        try:
+            result = subprocess.run(
+                [self.adb_path, command],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=self.start_timeout
+            )
+        except subprocess.TimeoutExpired:
+            self.logger.warning(f"'adb {command}' timed out")
+            return False
+        except OSError as e:
+            self.logger.error(f"Error while executing 'adb {command}': {e}")
+            return False
+
+        if result.returncode != 0:
+            stderr = result.stderr.decode(errors='replace').strip()
+            self.logger.warning(f"Error while executing 'adb {command}': {stderr}")
+            return False
+        return True
+
+    def ensure_running(self) -> bool:
+        """
+        Запускает сервер ADB, только если он не отвечает
+
+        Returns:
+            bool: True, если сервер доступен
+        """
+        if self.is_healthy():
+            return True
+
+        self.logger.info("ADB server is not responding, executing 'adb start-server'")
+        self._run('start-server')
+        return self.is_healthy()
+
+    def restart(self) -> bool:
+        """
+        Перезапускает сервер ADB (kill-server + start-server)
+
+        Returns:
+            bool: True, если после перезапуска сервер доступен
+        """
+        self.logger.info("Restarting ADB server")
+        self._run('kill-server')
+        return self.ensure_running()
+
+class CryptographyRSASigner:
+    """
+    RSA-подписчик ADB на основе пакета cryptography (OpenSSL).
+
+    Принимает ключи в том же виде, что и PythonRSASigner, но подписывает
+    заметно быстрее чистой Python-реализации rsa.
+    """
+
+    def __init__(self, pub: bytes, priv: bytes):
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding, utils
+
+        self.public_key = pub
+        self.rsa_key = serialization.load_pem_private_key(priv, password=None)
+        self._padding = padding.PKCS1v15()
+        self._algorithm = utils.Prehashed(hashes.SHA1())
+
+    def Sign(self, data: bytes) -> bytes:
+        return self.rsa_key.sign(data, self._padding, self._algorithm)
+
+    def GetPublicKey(self) -> bytes:
+        return self.public_key
+
+def _python_rsa_signer(pub: bytes, priv: bytes):
+    from adb_shell.auth.sign_pythonrsa import PythonRSASigner
+    return PythonRSASigner(pub, priv)
+
+# Доступные реализации подписи: имя -> фабрика (pub, priv) -> signer
+SIGNER_BACKENDS: Dict[str, Callable[[bytes, bytes], object]] = {
+    'cryptography': CryptographyRSASigner,
+    'pythonrsa': _python_rsa_signer,
+}
+
+class _NTPClientProtocol:
+    """UDP-протокол asyncio для одного NTP-запроса: первый ответ завершает future"""
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+
+    def connection_made(self, transport) -> None:
+        pass
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        pass
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+class DNSRecordCache:
+    """
+    Кэш DNS-записей NTP-серверов с учетом TTL.
+
+    Имена разрешаются параллельно один раз перед опросом, поэтому время DNS
+    не попадает в RTT, а каждый адрес пула проверяется отдельно. При
+    установленном dnspython используется TTL из ответа, иначе - DEFAULT_TTL:
+    getaddrinfo не сообщает время жизни записи.
+    """
+    DEFAULT_TTL = 300.0
+    MAX_ADDRESSES = 8  # Адресов на одно имя
+
+    def __init__(self, timeout: float = 2, default_ttl: Optional[float] = None):
+        """
+        Args:
+            timeout (float): Таймаут разрешения одного имени в секундах
+            default_ttl (float): Время жизни записи, если TTL неизвестен
+        """
+        self.timeout = timeout
+        self.default_ttl = default_ttl if default_ttl is not None else self.DEFAULT_TTL
+        self._records: Dict[str, dict] = {}
+        self._ipv6_route: Optional[bool] = None
+        self.logger = logging.getLogger(__name__)
+
+    def clear(self) -> None:
+        """Сбрасывает все записи"""
+        self._records.clear()
+
+    async def resolve_all(self, names: List[str], port: int,
+                          semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, dict]:
+        """
+        Разрешает все имена параллельно, используя непросроченные записи кэша
+
+        Args:
+            names (List[str]): Имена или IP-адреса серверов
+            port (int): Порт, подставляемый в адреса
+            semaphore (asyncio.Semaphore): Ограничение одновременных запросов
+
+        Returns:
+            Dict[str, dict]: Для каждого имени addresses [(family, address)],
+                latency (мс), ttl, cached и error при неудаче
+        """
+        import asyncio
+
+        unique_names = list(dict.fromkeys(names))
+        results = await asyncio.gather(
+            *(self.resolve(name, port, semaphore) for name in unique_names)
+        )
+        return dict(zip(unique_names, results))
+
+    async def resolve(self, name: str, port: int,
+                      semaphore: Optional[asyncio.Semaphore] = None) -> dict:
+        """Разрешает одно имя; ошибки разрешения не кэшируются"""
+        import asyncio
+        import contextlib
+
+        record = self._records.get(name)
+        if record is not None and record['expires'] > time.monotonic():
+            return dict(record, addresses=self._with_port(record['addresses'], port), cached=True)
+
+        try:
+            literal = ipaddress.ip_address(name)
+        except ValueError:
+            pass
+        else:
+            family = socket.AF_INET6 if literal.version == 6 else socket.AF_INET
+            return {'addresses': [(family, (name, port))], 'latency': 0.0, 'ttl': None, 'cached': False}
+
+        start_time = time.perf_counter()
+        try:
+            async with semaphore or contextlib.nullcontext():
+                hosts, ttl = await asyncio.wait_for(self._lookup(name), self.timeout)
+        except asyncio.TimeoutError:
+            return {'addresses': [], 'latency': None, 'ttl': None, 'cached': False,
+                    'error': 'DNS resolution timed out'}
+        except (socket.gaierror, OSError) as e:
+            return {'addresses': [], 'latency': None, 'ttl': None, 'cached': False, 'error': str(e)}
+        latency = (time.perf_counter() - start_time) * 1000
+
+        hosts = hosts[:self.MAX_ADDRESSES]
+        self._records[name] = {
+            'addresses': hosts,
+            'latency': latency,
+            'ttl': ttl,
+            'expires': time.monotonic() + ttl
+        }
+        self.logger.debug(f"Resolved {name} to {len(hosts)} addresses in {latency:.1f} ms (ttl {ttl:.0f}s)")
+        return {'addresses': self._with_port(hosts, port), 'latency': latency, 'ttl': ttl, 'cached': False}
+
+    async def _lookup(self, name: str) -> Tuple[List[Tuple[int, str]], float]:
+        """
+        Запрашивает адреса имени
+
+        Returns:
+            Tuple[List[Tuple[int, str]], float]: Пары (family, ip) и TTL в секундах
+        """
+        try:
+            import dns.asyncresolver
+        except ImportError:
+            return await self._lookup_getaddrinfo(name)
+
+        try:
+            return await self._lookup_dnspython(name)
+        except Exception as e:
+            # Имена из hosts и нестандартные резолверы dnspython не видит
+            self.logger.debug(f"dnspython lookup for {name} failed, using getaddrinfo: {e}")
+            return await self._lookup_getaddrinfo(name)
+
+    async def _lookup_dnspython(self, name: str) -> Tuple[List[Tuple[int, str]], float]:
+        """Запрашивает записи A и AAAA через dnspython с TTL из ответа"""
+        import asyncio
+        import dns.asyncresolver
+
+        queries = [('A', socket.AF_INET)]
+        if self._has_ipv6_route():
+            queries.append(('AAAA', socket.AF_INET6))
+
+        answers = await asyncio.gather(
+            *(dns.asyncresolver.resolve(name, rdtype, lifetime=self.timeout) for rdtype, _ in queries),
+            return_exceptions=True
+        )
+
+        hosts = []
+        ttls = []
+        for (_, family), answer in zip(queries, answers):
+            if isinstance(answer, Exception):
+                continue
+            ttls.append(answer.rrset.ttl)
+            hosts.extend((family, record.address) for record in answer)
+
+        if not hosts:
+            errors = [answer for answer in answers if isinstance(answer, Exception)]
+            raise socket.gaierror(str(errors[0]) if errors else f"No addresses for {name}")
+        return list(dict.fromkeys(hosts)), float(min(ttls))
+
+    async def _lookup_getaddrinfo(self, name: str) -> Tuple[List[Tuple[int, str]], float]:
+        """Запрашивает адреса через системный резолвер; TTL неизвестен"""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        addr_info = await loop.getaddrinfo(
+            name, None, type=socket.SOCK_DGRAM, flags=socket.AI_ADDRCONFIG
+        )
+        hosts = list(dict.fromkeys((family, address[0]) for family, _, _, _, address in addr_info))
+        return hosts, self.default_ttl
+
+    def _has_ipv6_route(self) -> bool:
+        """Проверяет наличие маршрута IPv6, чтобы не опрашивать недоступные адреса AAAA"""
+        if self._ipv6_route is None:
+            try:
+                with socket.socket(socket.AF_INET6, socket.SOCK_DGRAM) as probe:
+                    # connect для UDP только выбирает маршрут, пакет не отправляется
+                    probe.connect(('2001:db8::1', 123))
+                self._ipv6_route = True
+            except OSError:
+                self._ipv6_route = False
+        return self._ipv6_route
+
+    @staticmethod
+    def _with_port(hosts: List[Tuple[int, str]], port: int) -> List[Tuple[int, tuple]]:
+        """Преобразует пары (family, ip) в адреса для сокета"""
+        return [(family, (host, port)) for family, host in hosts]
+
+class NTPProbeEngine:
+    """
+    Асинхронная проверка NTP-серверов по UDP.
+
+    Все запросы отправляются одновременно: число одновременных запросов
+    ограничено семафором, а весь опрос - общим дедлайном. Без явного
+    дедлайна он равен числу волн запросов (запросы / concurrency) × timeout,
+    поэтому проверка занимает несколько таймаутов, а не N серверов × count × timeout.
+    """
+    NTP_PORT = 123
+    ORIGIN_TOLERANCE = 1e-5  # Погрешность float при сравнении originate timestamp, сек
+
+    def __init__(self, timeout: float = 2, count: int = 3, concurrency: int = 512,
+                 deadline: Optional[float] = None, resolver: Optional[DNSRecordCache] = None):
+        """
+        Args:
+            timeout (float): Таймаут ожидания ответа на один запрос в секундах
+            count (int): Количество запросов к серверу, распределяемых по его адресам
+            concurrency (int): Максимальное число одновременных запросов
+            deadline (float): Общий лимит времени на весь опрос в секундах;
+                по умолчанию вычисляется из числа запросов после разрешения имен
+            resolver (DNSRecordCache): Кэш DNS, общий для повторных проверок
+        """
+        self.timeout = timeout
+        self.count = count
+        self.concurrency = concurrency
+        self.deadline = deadline
+        self.resolver = resolver if resolver is not None else DNSRecordCache(timeout=timeout)
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, servers: List[str]) -> Dict[str, List[dict]]:
+        """
+        Синхронная обертка над probe_all для вызова из меню
+
+        Returns:
+            Dict[str, List[dict]]: Попытки опроса для каждого сервера
+        """
+        import asyncio
+
+        return asyncio.run(self.probe_all(servers))
+
+    async def probe_all(self, servers: List[str]) -> Dict[str, List[dict]]:
+        """
+        Разрешает все имена одним параллельным этапом, затем отправляет
+        count запросов на сервер, распределяя их по его адресам по кругу:
+        число запросов не растет с числом адресов пула, и опрос укладывается
+        примерно в один timeout
+
+        Результат собирается по отдельным попыткам: по истечении дедлайна
+        отменяются только незавершенные запросы, ответы остальных сохраняются.
+        """
+        import asyncio
+        import math
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        unique_servers = list(dict.fromkeys(servers))
+        resolved = await self.resolver.resolve_all(unique_servers, self.NTP_PORT, semaphore)
+
+        results: Dict[str, List[dict]] = {}
+        probes = []  # (сервер, адрес, задача)
+        for server in unique_servers:
+            resolution = resolved[server]
+            if not resolution['addresses']:
+                results[server] = [{
+                    'status': 'DNS Resolution Error',
+                    'error': resolution.get('error') or 'Could not resolve server hostname'
+                }] * self.count
+                continue
+            results[server] = []
+            addresses = resolution['addresses']
+            for attempt in range(self.count):
+                family, address = addresses[attempt % len(addresses)]
+                task = asyncio.ensure_future(self._probe_address(family, address, semaphore))
+                probes.append((server, address, task))
+
+        if self.deadline is not None:
+            # Время DNS вычитается из дедлайна, но на сам опрос остается не меньше timeout
+            remaining = max(self.deadline - (loop.time() - started), self.timeout)
+        else:
+            # Занятый запросом слот семафора освобождается не позже чем через timeout
+            remaining = math.ceil(len(probes) / self.concurrency) * self.timeout + 1
+
+        pending = set()
+        if probes:
+            _, pending = await asyncio.wait([task for _, _, task in probes], timeout=remaining)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.logger.info(f"NTP probe deadline reached, {len(pending)} requests cancelled")
+
+        for server, address, task in probes:
+            if task.cancelled() or task.exception() is not None:
+                attempt = {'status': 'Timeout', 'error': 'Probe deadline exceeded'}
+            else:
+                attempt = task.result()
+            resolution = resolved[server]
+            results[server].append(dict(
+                attempt, address=address[0], dns_latency=resolution['latency'],
+                dns_cached=resolution['cached']
+            ))
+        return results
+
+    async def _probe_address(self, family: int, address: tuple,
+                             semaphore: asyncio.Semaphore) -> dict:
+        """Отправляет один NTP-запрос и ждет ответ не дольше timeout"""
+        import asyncio
+        import ntplib
+
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            transport = None
+            try:
+                future = loop.create_future()
+                transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _NTPClientProtocol(future),
+                    family=family,
+                    remote_addr=address
+                )
+                sent_at = time.time()
+                request = ntplib.NTPPacket(
+                    mode=3,
+                    version=3,
+                    tx_timestamp=ntplib.system_to_ntp_time(sent_at)
+                )
+
+                start_time = time.perf_counter()
+                transport.sendto(request.to_data())
+                data = await asyncio.wait_for(future, self.timeout)
+                elapsed = time.perf_counter() - start_time
+
+                stats = ntplib.NTPStats()
+                stats.from_data(data)
+                # Момент приема считается по монотонным часам от момента отправки:
+                # скачок системного времени во время запроса не искажает delay и offset
+                stats.dest_timestamp = ntplib.system_to_ntp_time(sent_at + elapsed)
+                if abs(stats.orig_timestamp - request.tx_timestamp) > self.ORIGIN_TOLERANCE:
+                    raise ntplib.NTPException("Originate timestamp does not match the request")
+
+                return {
+                    'status': 'Successful',
+                    'rtt': elapsed * 1000,  # Convert to milliseconds
+                    'delay': stats.delay * 1000,
+                    'offset': stats.offset * 1000,
+                    'root_delay': stats.root_delay * 1000,
+                    'root_dispersion': stats.root_dispersion * 1000,
+                    'stratum': stats.stratum,
+                    'leap': stats.leap
+                }
+            except ntplib.NTPException as e:
+                return {'status': 'NTP Protocol Error', 'error': str(e)}
+            except asyncio.TimeoutError:
+                return {'status': 'Timeout', 'error': 'Connection timed out'}
+            except Exception as e:
+                return {'status': 'Unexpected Error', 'error': str(e)}
+            finally:
+                if transport is not None:
+                    transport.close()
+
+class ConnectionState(Enum):
+    """Состояние подключения к устройству при ожидании авторизации"""
+    CONNECTING = 'connecting'
+    REFUSED = 'refused'  # Порт закрыт: отладка по сети выключена
+    OFFLINE = 'offline'  # Устройство не отвечает
+    UNAUTHORIZED = 'unauthorized'  # Ключ не подтвержден на экране ТВ
+
+class DeviceSession:
+    """
+    Сессия с устройством поверх подключенного AdbDeviceTcp.
+
+    Кроме обычного shell поддерживает пакетное выполнение: несколько
+    команд объединяются в один скрипт `sh -c` с разделителями и
+    выполняются за один round-trip, а вывод разбирается по ключам.
+    """
+
+    def __init__(self, device: AdbDeviceTcp, ip: str, port: int = 5555):
+        self.device = device
+        self.ip = ip
+        self.port = port
+        self.last_used = time.monotonic()
+        self.active = 0  # Число выполняемых команд: такую сессию пул не вытесняет
+
+    @property
+    def address(self) -> str:
+        return f"{self.ip}:{self.port}"
+
+    def shell(self, command: str, **kwargs) -> str:
+        """Выполняет одну команду в отдельном потоке ADB"""
+        self.last_used = time.monotonic()
+        self.active += 1
+        try:
+            return self.device.shell(command, **kwargs)
+        finally:
+            self.active -= 1
+            self.last_used = time.monotonic()
+
+    def streaming_shell(self, command: str, **kwargs):
+        """Выполняет команду и отдает вывод блоками по мере поступления"""
+        self.active += 1
+        try:
+            for chunk in self.device.streaming_shell(command, **kwargs):
+                self.last_used = time.monotonic()
+                yield chunk
+        finally:
+            self.active -= 1
+            self.last_used = time.monotonic()
+
+    def shell_batch(self, commands: Dict[str, str], **kwargs) -> Dict[str, str]:
+        """
+        Выполняет несколько команд за один вызов shell
+
+        Args:
+            commands (Dict[str, str]): Ключ результата -> команда
+
+        Returns:
+            Dict[str, str]: Ключ результата -> вывод команды (stdout и stderr)
+        """
+        if not commands:
+            return {}
+        script, marker = self.build_batch_script(commands)
+        output = self.shell(script, **kwargs)
+        return self.parse_batch_output(output, marker, commands)
+
+    def is_alive(self, timeout: float = 3) -> bool:
+        """Проверяет, что транспорт открыт и устройство отвечает на команду"""
+        if not self.device.available:
+            return False
+        try:
+            return self.shell('echo ok', transport_timeout_s=timeout).strip() == 'ok'
+        except Exception as e:
+            logger.debug(f"Keepalive check failed for {self.address}: {e}")
+            return False
+
+    def close(self) -> None:
+        try:
+            self.device.close()
+        except Exception as e:
+            logger.debug(f"Error closing session {self.address}: {e}")
+
+    @staticmethod
+    def build_batch_script(commands: Dict[str, str]) -> Tuple[str, str]:
+        """
+        Собирает пакет команд в один скрипт `sh -c`
+
+        Перед выводом каждой команды печатается строка-разделитель
+        с уникальным маркером и ключом результата.
+
+        Returns:
+            Tuple[str, str]: (команда для shell, маркер разделителя)
+        """
+        marker = f"__ATF_{uuid.uuid4().hex}__:"
+        lines = []
+        for key, command in commands.items():
+            lines.append(f"echo {shlex.quote(marker + key)}")
+            lines.append(f"{{ {command}; }} 2>&1")
+            lines.append("echo")
+        return f"sh -c {shlex.quote(chr(10).join(lines))}", marker
+
+    @staticmethod
+    def parse_batch_output(output: str, marker: str, commands: Dict[str, str]) -> Dict[str, str]:
+        """Разбирает вывод пакета обратно по ключам"""
+        chunks: Dict[str, List[str]] = {key: [] for key in commands}
+        current_key = None
+        for line in output.splitlines():
+            if line.startswith(marker):
+                current_key = line[len(marker):].strip()
+                continue
+            if current_key in chunks:
+                chunks[current_key].append(line)
+        return {key: '\n'.join(lines).strip() for key, lines in chunks.items()}
+
+class AsyncDeviceSession:
+    """
+    Асинхронная сессия с устройством поверх подключенного AdbDeviceTcpAsync.
+
+    Пакетный формат команд тот же, что у DeviceSession, поэтому одна
+    операция - один round-trip без блокировки потока ОС.
+    """
+
+    def __init__(self, device: AdbDeviceTcpAsync, ip: str, port: int = 5555):
+        self.device = device
+        self.ip = ip
+        self.port = port
+        self.last_used = time.monotonic()
+
+    @property
+    def address(self) -> str:
+        return f"{self.ip}:{self.port}"
+
+    async def shell(self, command: str, **kwargs) -> str:
+        """Выполняет одну команду в отдельном потоке ADB"""
+        self.last_used = time.monotonic()
+        return await self.device.shell(command, **kwargs)
+
+    async def shell_batch(self, commands: Dict[str, str], **kwargs) -> Dict[str, str]:
+        """Выполняет несколько команд за один вызов shell (см. DeviceSession.shell_batch)"""
+        if not commands:
+            return {}
+        script, marker = DeviceSession.build_batch_script(commands)
+        output = await self.shell(script, **kwargs)
+        return DeviceSession.parse_batch_output(output, marker, commands)
+
+    async def close(self) -> None:
+        try:
+            await self.device.close()
+        except Exception as e:
+            logger.debug(f"Error closing session {self.address}: {e}")
+
+class DeviceSessionPool:
+    """
+    Пул авторизованных сессий с устройствами, ключ - ip:port.
+
+    Повторное действие с тем же устройством использует уже открытое
+    подключение без нового TCP-рукопожатия и RSA-авторизации. Сессия,
+    простоявшая дольше keepalive_interval, перед выдачей проверяется
+    командой echo. Сессии, простоявшие дольше idle_timeout, закрывает
+    фоновый поток; при превышении max_size закрываются давно не
+    использованные (LRU). Сессии с выполняемой командой не вытесняются.
+    """
+
+    def __init__(self, idle_timeout: float = 600, keepalive_interval: float = 30, max_size: int = 64):
+        from collections import OrderedDict
+
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.max_size = max_size
+        self._sessions: OrderedDict[str, DeviceSession] = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictor: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, ip: str, port: int = 5555) -> Optional[DeviceSession]:
+        """Возвращает живую сессию из пула или None"""
+        self.evict_idle()
+        key = f"{ip}:{port}"
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+        if session is None:
+            return None
+
+        if time.monotonic() - session.last_used < self.keepalive_interval or session.is_alive():
+            session.last_used = time.monotonic()
+            logger.info(f"Reusing ADB session {key}")
+            return session
+
+        logger.info(f"ADB session {key} is no longer alive, reconnecting")
+        self.discard(session)
+        return None
+
+    def put(self, session: DeviceSession) -> None:
+        """
+        Добавляет сессию в пул, закрывая предыдущую для того же адреса
+        и давно не использованные сессии сверх max_size
+        """
+        with self._lock:
+            previous = self._sessions.get(session.address)
+            self._sessions[session.address] = session
+            self._sessions.move_to_end(session.address)
+            overflow = []
+            if len(self._sessions) > self.max_size:
+                for candidate in list(self._sessions.values()):
+                    if len(self._sessions) <= self.max_size:
+                        break
+                    if candidate is not session and not candidate.active:
+                        del self._sessions[candidate.address]
+                        overflow.append(candidate)
+        if previous is not None and previous is not session:
+            previous.close()
+        for evicted in overflow:
+            logger.info(f"Closing least recently used ADB session {evicted.address}")
+            evicted.close()
+        self._start_evictor()
+
+    def acquire(self, ip: str, port: int, opener: Callable[[], DeviceSession]) -> DeviceSession:
+        """Возвращает сессию из пула или открывает новую через opener"""
+        session = self.get(ip, port)
+        if session is None:
+            session = opener()
+            self.put(session)
+        return session
+
+    def discard(self, session: DeviceSession) -> None:
+        """Удаляет сессию из пула и закрывает ее"""
+        with self._lock:
+            if self._sessions.get(session.address) is session:
+                del self._sessions[session.address]
+        session.close()
+
+    def evict_idle(self) -> None:
+        """Закрывает сессии, не использовавшиеся дольше idle_timeout"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                session for session in self._sessions.values()
+                if now - session.last_used > self.idle_timeout and not session.active
+            ]
+            for session in expired:
+                del self._sessions[session.address]
+        for session in expired:
+            logger.info(f"Closing idle ADB session {session.address}")
+            session.close()
+
+    def close_all(self) -> None:
+        self._closed.set()
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def _start_evictor(self) -> None:
+        """Запускает фоновое закрытие простаивающих сессий, пока пул не пуст"""
+        with self._lock:
+            if self._evictor is not None and self._evictor.is_alive():
+                return
+            self._closed.clear()
+            self._evictor = threading.Thread(target=self._evict_loop, name='adb-session-evictor', daemon=True)
+            self._evictor.start()
+
+    def _evict_loop(self) -> None:
+        while not self._closed.wait(self.keepalive_interval):
+            self.evict_idle()
+            with self._lock:
+                if not self._sessions:
+                    # Поток перезапустится при следующем put
+                    self._evictor = None
+                    return
+
+class DeviceDiscovery:
+    """
+    Асинхронный поиск устройств с открытым портом ADB в подсетях.
+
+    Неблокирующие TCP-подключения выполняются одновременно тысячами
+    с коротким таймаутом. Адреса из таблицы соседей (ARP) хоста
+    проверяются первыми, так как это заведомо живые узлы.
+    """
+
+    def __init__(self, port: int = 5555, timeout: float = 0.5, concurrency: int = 2048):
+        self.port = port
+        self.timeout = timeout
+        self.concurrency = self._fit_concurrency(concurrency)
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def _fit_concurrency(concurrency: int) -> int:
+        """Поднимает лимит открытых файлов, если он меньше нужного числа сокетов"""
+        try:
+            import resource
+        except ImportError:
+            # В Windows лимита RLIMIT_NOFILE нет
+            return concurrency
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = concurrency + 128
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            new_soft = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (new_soft, hard))
+                soft = new_soft
+            except (ValueError, OSError):
+                pass
+            concurrency = max(16, min(concurrency, soft - 128))
+        return concurrency
+
+    @staticmethod
+    def read_neighbor_table() -> List[str]:
+        """Возвращает IPv4-адреса из таблицы соседей (ARP) хоста"""
+        neighbors = []
+        try:
+            if sys.platform.startswith('linux') and os.path.exists('/proc/net/arp'):
+                with open('/proc/net/arp', 'r') as f:
+                    for line in f.readlines()[1:]:
+                        fields = line.split()
+                        # Флаг 0x0 - запись не завершена (узел не ответил)
+                        if len(fields) >= 3 and fields[2] != '0x0':
+                            neighbors.append(fields[0])
+            else:
+                output = subprocess.run(
+                    ['arp', '-a'],
+                    capture_output=True,
+                    text=True,
+                    timeout=5
+                ).stdout
+                neighbors = re.findall(r'\b(\d{1,3}(?:\.\d{1,3}){3})\b', output)
+        except Exception as e:
+            logger.debug(f"Failed to read neighbor table: {e}")
+        return list(dict.fromkeys(neighbors))
+
+    @staticmethod
+    def default_networks() -> List[str]:
+        """Определяет /24 подсеть хоста по адресу исходящего интерфейса"""
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                # Пакеты не отправляются, сокет только выбирает интерфейс
+                s.connect(('10.255.255.255', 1))
+                local_ip = s.getsockname()[0]
+            return [str(ipaddress.ip_network(f"{local_ip}/24", strict=False))]
+        except OSError:
+            return []
+
+    @staticmethod
+    def parse_networks(text: str) -> Tuple[List[ipaddress.IPv4Network], List[str]]:
+        """
+        Разбирает список подсетей CIDR или отдельных адресов
+
+        Returns:
+            Tuple[List[IPv4Network], List[str]]: (подсети, некорректные записи)
+        """
+        networks, invalid = [], []
+        for item in re.split(r'[,;\s]+', text.strip()):
+            if not item:
+                continue
+            try:
+                network = ipaddress.ip_network(item, strict=False)
+                if network.version != 4:
+                    raise ValueError(item)
+                networks.append(network)
+            except ValueError:
+                invalid.append(item)
+        return networks, invalid
+
+    def scan(self, networks: List[ipaddress.IPv4Network]) -> List[str]:
+        """Синхронная обертка над scan_async"""
+        import asyncio
+
+        return asyncio.run(self.scan_async(networks))
+
+    async def scan_async(self, networks: List[ipaddress.IPv4Network]) -> List[str]:
+        """
+        Проверяет порт ADB на всех адресах подсетей
+
+        Returns:
+            List[str]: Адреса с открытым портом ADB, по возрастанию
+        """
+        import asyncio
+
+        targets = []
+        for network in networks:
+            hosts = list(network.hosts()) if network.num_addresses > 2 else list(network)
+            targets.extend(str(host) for host in hosts)
+        targets = list(dict.fromkeys(targets))
+        target_set = set(targets)
+
+        known = [ip for ip in self.read_neighbor_table() if ip in target_set]
+        known_set = set(known)
+        rest = [ip for ip in targets if ip not in known_set]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        found = []
+        start_time = time.monotonic()
+        for batch in (known, rest):
+            if not batch:
+                continue
+            results = await asyncio.gather(*(self._check(ip, semaphore) for ip in batch))
+            found.extend(ip for ip in results if ip)
+
+        self.logger.info(
+            f"Discovery: {len(targets)} addresses ({len(known)} from ARP) scanned "
+            f"in {time.monotonic() - start_time:.2f}s, {len(found)} with port {self.port} open"
+        )
+        return sorted(found, key=ipaddress.ip_address)
+
+    async def _check(self, ip: str, semaphore: asyncio.Semaphore) -> Optional[str]:
+        import asyncio
+
+        async with semaphore:
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(ip, self.port),
+                    self.timeout
+                )
+            except (OSError, asyncio.TimeoutError):
+                return None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return ip
+
+class RotatingCompressedWriter:
+    """
+    Пишет поток байтов в сжатые файлы с ротацией по размеру
+
+    Файлы именуются <prefix>_001.log.gz, <prefix>_002.log.gz и т.д.
+    Размер для ротации считается по несжатым данным. Сжатие zstd
+    используется, если установлен пакет zstandard, иначе gzip.
+    """
+
+    def __init__(self, directory: Path, prefix: str, max_bytes: int = 64 * 1024 * 1024,
+                 compression: str = 'gzip'):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.compression = compression
+        if compression == 'zstd':
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                logger.warning("zstandard is not installed, falling back to gzip")
+                self.compression = 'gzip'
+        self.files: List[Path] = []
+        self._stream = None
+        self._raw = None
+        self._written = 0
+
+    def _open_next(self) -> None:
+        self.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        suffix = 'zst' if self.compression == 'zstd' else 'gz'
+        path = self.directory / f"{self.prefix}_{len(self.files) + 1:03d}.log.{suffix}"
+        if self.compression == 'zstd':
+            import zstandard
+
+            self._raw = open(path, 'wb')
+            self._stream = zstandard.ZstdCompressor(level=3).stream_writer(self._raw)
+        else:
+            import gzip
+
+            self._stream = gzip.open(path, 'wb', compresslevel=6)
+        self.files.append(path)
+        self._written = 0
+        logger.info(f"Writing capture to {path}")
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+        if self._stream is None or self._written + len(data) > self.max_bytes:
+            self._open_next()
+        self._stream.write(data)
+        self._written += len(data)
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._raw is not None:
+            self._raw.close()
+            self._raw = None
+
+    def __enter__(self) -> 'RotatingCompressedWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+@dataclass
+class FleetResult:
+    """Результат применения сервера NTP к одному устройству парка"""
+    ip: str
+    status: str
+    previous_ntp: Optional[str] = None
+    current_ntp: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    phases: Dict[str, float] = field(default_factory=dict)  # Длительность этапов, мс
+    change: Optional[str] = None  # 'changed' или 'unchanged' (запись не потребовалась)
+
+@dataclass
+class NtpApplyResult:
+    """Результат идемпотентной установки сервера NTP"""
+    status: str  # 'changed' или 'unchanged'
+    previous: Optional[str]
+    current: str
+
+@dataclass
+class InventoryEntry:
+    """Строка файла инвентаризации для массового развертывания"""
+    ip: str
+    port: int = 5555
+    ntp_server: Optional[str] = None
+    country: Optional[str] = None
+
+@dataclass
+class DriftSample:
+    """Одно измерение расхождения часов устройства с эталоном NTP"""
+    ip: str
+    timestamp: float
+    offset_ms: Optional[float] = None
+    rtt_ms: Optional[float] = None
+    error: Optional[str] = None
+
+class PropertySnapshot:
+    """
+    Снимок системных свойств устройства из одного вызова `getprop`
+
+    Вывод вида `[ключ]: [значение]` разбирается один раз в словарь,
+    значения читаются типизированными методами.
+    """
+    LINE_PATTERN = re.compile(r'^\[([^\]]+)\]: \[(.*?)\]$', re.MULTILINE | re.DOTALL)
+    TRUE_VALUES = ('1', 'true', 'y', 'yes', 'on')
+    FALSE_VALUES = ('0', 'false', 'n', 'no', 'off')
+
+    def __init__(self, properties: Optional[Dict[str, str]] = None):
+        self.properties = properties or {}
+
+    @classmethod
+    def parse(cls, output: str) -> 'PropertySnapshot':
+        return cls({key: value for key, value in cls.LINE_PATTERN.findall(output.replace('\r\n', '\n'))})
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.properties
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    def get_str(self, key: str, default: str = '') -> str:
+        return self.properties.get(key, default)
+
+    def get_int(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        try:
+            return int(self.properties[key])
+        except (KeyError, ValueError):
+            return default
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self.properties.get(key, '').strip().lower()
+        if value in self.TRUE_VALUES:
+            return True
+        if value in self.FALSE_VALUES:
+            return False
+        return default
+
+class DevicePropertyCache:
+    """
+    Постоянный кэш неизменяемых свойств устройств (device_cache.json)
+
+    Ключ - серийный номер, запись действительна только для того же
+    ro.build.fingerprint: после обновления прошивки свойства читаются заново.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, dict]] = None
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Device cache {self.path} is unreadable, starting empty: {e}")
+        return self._entries
+
+    def get(self, serial: str, fingerprint: str) -> Optional[Dict[str, str]]:
+        """Возвращает сохраненные свойства или None, если их нет или прошивка изменилась"""
+        if not serial or not fingerprint:
+            return None
+        with self._lock:
+            entry = self._load().get(serial)
+        if entry is None or entry.get('fingerprint') != fingerprint:
+            return None
+        return dict(entry['properties'])
+
+    def put(self, serial: str, fingerprint: str, properties: Dict[str, str]) -> None:
+        """Сохраняет свойства устройства, заменяя запись для старой прошивки"""
+        if not serial or not fingerprint:
+            return
+        with self._lock:
+            entries = self._load()
+            entries[serial] = {
+                'fingerprint': fingerprint,
+                'properties': properties,
+                'updated': time.time()
+            }
+            try:
+                # Запись через временный файл, чтобы не повредить кэш при сбое
+                tmp_path = self.path.with_suffix('.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Failed to save device cache {self.path}: {e}")
+
+class ClockDriftMonitor:
+    """
+    Периодически измеряет расхождение часов устройств с эталоном NTP
+
+    Время устройства читается командой `date +%s%N` через сессию из пула
+    и сравнивается с временем ПК в середине round-trip shell, исправленным
+    на смещение часов ПК относительно эталонного сервера NTP.
+
+    Планировщик - куча (heapq) сроков измерений: фазы устройств равномерно
+    распределены по интервалу, поэтому даже для тысяч устройств
+    измерения идут ровным потоком, без всплесков.
+    """
+
+    def __init__(self, ips: List[str], session_factory: Callable[[str], DeviceSession],
+                 discard: Callable[[DeviceSession], None], interval: float = 60,
+                 threshold_ms: float = 1000, max_workers: int = 32,
+                 reference_server: str = 'pool.ntp.org', reference_refresh: float = 600,
+                 output_path: Optional[Path] = None):
+        self.ips = list(dict.fromkeys(ips))
+        self.session_factory = session_factory
+        self.discard = discard
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.max_workers = max_workers
+        self.reference_server = reference_server
+        self.reference_refresh = reference_refresh
+        self.output_path = output_path
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._in_flight: set = set()
+        self._lock = threading.Lock()
+        # Отдельная блокировка: запрос к эталону не должен останавливать планировщик
+        self._reference_lock = threading.Lock()
+        self._reference_offset = 0.0
+        self._reference_time: Optional[float] = None
+        self._reference_refreshing = False
+        self._output = None
+        self._csv_writer = None
+
+    def reference_offset(self) -> float:
+        """
+        Смещение часов ПК относительно эталонного сервера NTP в секундах
+        (эталонное время = time.time() + смещение), обновляется раз в reference_refresh
+
+        Запрос к серверу выполняет один поток и без блокировки; остальные
+        на это время получают последнее известное смещение.
+        """
+        import ntplib
+
+        with self._reference_lock:
+            fresh = (self._reference_time is not None
+                     and time.monotonic() - self._reference_time < self.reference_refresh)
+            if fresh or self._reference_refreshing:
+                return self._reference_offset
+            self._reference_refreshing = True
+
+        offset = None
+        try:
+            response = ntplib.NTPClient().request(self.reference_server, version=3, timeout=2)
+            offset = response.offset
+            self.logger.info(f"NTP reference {self.reference_server}: host offset {offset * 1000:.1f} ms")
+        except Exception as e:
+            # Используется последнее известное смещение
+            self.logger.warning(f"NTP reference {self.reference_server} is unavailable: {e}")
+
+        with self._reference_lock:
+            if offset is not None:
+                self._reference_offset = offset
+            self._reference_time = time.monotonic()
+            self._reference_refreshing = False
+            return self._reference_offset
+
+    @staticmethod
+    def parse_device_time(output: str) -> float:
+        """Разбирает вывод `date +%s%N` в секунды (toybox без %N печатает 'N')"""
+        value = output.strip()
+        if value.endswith('N'):
+            return float(value[:-1].rstrip('%'))
+        if len(value) > 10:
+            return int(value) / 1e9
+        return float(value)
+
+    def sample(self, ip: str) -> DriftSample:
+        """Одно измерение расхождения часов устройства"""
+        result = DriftSample(ip=ip, timestamp=time.time())
+        session = None
+        try:
+            reference_offset = self.reference_offset()
+            session = self.session_factory(ip)
+            wall_start = time.time()
+            start = time.perf_counter()
+            output = session.shell('date +%s%N', transport_timeout_s=5, read_timeout_s=5)
+            rtt = time.perf_counter() - start
+            device_time = self.parse_device_time(output)
+            # Время устройства соответствует середине round-trip
+            reference_time = wall_start + rtt / 2 + reference_offset
+            result.offset_ms = (device_time - reference_time) * 1000
+            result.rtt_ms = rtt * 1000
+        except Exception as e:
+            result.error = str(e).splitlines()[0] if str(e) else type(e).__name__
+            if session is not None:
+                self.discard(session)
+        return result
+
+    def _record(self, result: DriftSample) -> None:
+        if result.error:
+            self.logger.warning(f"Drift sample failed for {result.ip}: {result.error}")
+        elif abs(result.offset_ms) > self.threshold_ms:
+            self.logger.warning(
+                f"Clock drift alert: {result.ip} is off by {result.offset_ms:+.0f} ms "
+                f"(threshold {self.threshold_ms:.0f} ms, rtt {result.rtt_ms:.0f} ms)"
+            )
+        else:
+            self.logger.info(f"Drift {result.ip}: {result.offset_ms:+.1f} ms (rtt {result.rtt_ms:.0f} ms)")
+
+        if self._output is None:
+            return
+        with self._lock:
+            if self._csv_writer is not None:
+                self._csv_writer.writerow(asdict(result).values())
+            else:
+                self._output.write(json.dumps(asdict(result), ensure_ascii=False) + '\n')
+            self._output.flush()
+
+    def _run_sample(self, ip: str) -> None:
+        try:
+            self._record(self.sample(ip))
+        finally:
+            with self._lock:
+                self._in_flight.discard(ip)
+
+    def run(self, duration: Optional[float] = None) -> None:
+        """
+        Запускает мониторинг до вызова stop(), Ctrl+C или истечения duration секунд
+        """
+        import heapq
+
+        if not self.ips:
+            return
+
+        if self.output_path is not None:
+            new_file = not self.output_path.exists()
+            self._output = open(self.output_path, 'a', encoding='utf-8', newline='')
+            if self.output_path.suffix.lower() == '.csv':
+                import csv
+
+                self._csv_writer = csv.writer(self._output)
+                if new_file:
+                    self._csv_writer.writerow(DriftSample.__dataclass_fields__)
+
+        # Первое смещение запрашивается до старта, чтобы ранние измерения его учитывали
+        self.reference_offset()
+
+        self._stop.clear()
+        start = time.monotonic()
+        end = start + duration if duration else None
+        # Фазы равномерно распределены по интервалу
+        schedule = [
+            (start + self.interval * index / len(self.ips), index, ip)
+            for index, ip in enumerate(self.ips)
+        ]
+        heapq.heapify(schedule)
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.ips)))
+        try:
+            while not self._stop.is_set():
+                due, index, ip = schedule[0]
+                now = time.monotonic()
+                if end is not None and now >= end:
+                    break
+                if due > now:
+                    self._stop.wait((due if end is None else min(due, end)) - now)
+                    continue
+
+                heapq.heapreplace(schedule, (due + self.interval, index, ip))
+                with self._lock:
+                    if ip in self._in_flight:
+                        # Предыдущее измерение еще не завершилось - пропускаем
+                        self.logger.debug(f"Skipping drift sample for {ip}: previous one is still running")
+                        continue
+                    self._in_flight.add(ip)
+                executor.submit(self._run_sample, ip)
+        finally:
+            self._stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            if self._output is not None:
+                self._output.close()
+                self._output = None
+                self._csv_writer = None
+
+    def stop(self) -> None:
+        self._stop.set()
+
+class _LineRingBuffer:
+    """Хранит последние max_lines строк потокового текста"""
+
+    def __init__(self, max_lines: int):
+        from collections import deque
+
+        self.lines = deque(maxlen=max_lines)
+        self.partial = ''
+
+    def feed(self, text: str) -> None:
+        parts = (self.partial + text).split('\n')
+        self.partial = parts.pop()
+        self.lines.extend(parts)
+
+    def text(self) -> str:
+        lines = list(self.lines)
+        if self.partial:
+            lines.append(self.partial)
+        return '\n'.join(line.rstrip() for line in lines)
+
+class AndroidTVTimeFixer:
+    # Подписчики кэшируются на весь процесс: (папка ключей, backend) -> signer
+    _signer_cache: Dict[Tuple[str, str], object] = {}
+    _signer_lock = threading.Lock()
+    # Размер блока чтения вывода команд терминала
+    OUTPUT_CHUNK_SIZE = 65536
+    # Команды сбора информации об устройстве: ключ результата -> команда shell
+    DEVICE_INFO_COMMANDS = {
+        'model': 'getprop ro.product.model',
+        'brand': 'getprop ro.product.brand',
+        'name': 'getprop ro.product.name',
+        'android_version': 'getprop ro.build.version.release',
+        'api_level': 'getprop ro.build.version.sdk',
+        'serial': 'getprop ro.boot.serialno',
+        'cpu_arch': 'getprop ro.product.cpu.abi',
+        'hardware': 'getprop ro.hardware',
+        #'ip_address': 'ip addr show wlan0 | grep "inet "',
+        #'ip_address': "ip -f inet addr show wlan0 | awk '/inet / {print $2}' | cut -d'/' -f1",
+        'ip_address': 'ip addr show wlan0',
+        'mac_address': 'cat /sys/class/net/wlan0/address',
+        #'wifi_ssid': 'dumpsys wifi | grep "mWifiInfo"',
+        # Дополнительные сетевые параметры
+        'network_type': 'getprop gsm.network.type',
+        'cellular_operator': 'getprop gsm.operator.alpha',
+        # Информация о подключениях
+        #'active_connections': 'netstat -tuln',
+        'battery_level': 'dumpsys battery | grep level',
+        'battery_status': 'dumpsys battery | grep status',
+        'manufacturer': 'getprop ro.product.manufacturer',
+        'device': 'getprop ro.product.device',
+        'build_id': 'getprop ro.build.id',
+        'build_fingerprint': 'getprop ro.build.fingerprint',
+        'uptime': 'cat /proc/uptime',
+        'total_ram': "cat /proc/meminfo | grep 'MemTotal'",
+        'available_ram': "cat /proc/meminfo | grep 'MemAvailable'",
+        'screen_resolution': 'wm size',
+        'screen_density': 'wm density',
+        'timezone': 'getprop persist.sys.timezone',
+        'locale': 'getprop persist.sys.locale',
+        'cpu_cores': 'cat /proc/cpuinfo | grep "^processor" | wc -l',
+        'bootloader_version': 'getprop ro.bootloader',  # Версия загрузчика
+        'baseband_version': 'getprop gsm.version.baseband',
+        'kernel_version': 'uname -r',
+        'secure_boot_status': 'getprop ro.boot.secureboot'
+    }
+    # Поля 'getprop <имя>' читаются из одного дампа getprop при каждом запросе.
+    # Из остальных команд каждый раз выполняются только изменяемые, прочие
+    # берутся из кэша, пока не изменится ro.build.fingerprint
+    DEVICE_INFO_VOLATILE = (
+        'ip_address',
+        'battery_level',
+        'battery_status',
+        'uptime',
+        'available_ram',
+    )
+    # Ключ дампа getprop в пакете команд
+    GETPROP_KEY = '_getprop'
+    # Теги logcat, связанные с синхронизацией времени
+    LOGCAT_TIME_TAGS = (
+        'NetworkTimeUpdateService',
+        'SntpClient',
+        'NtpTrustedTime',
+        'TimeDetectorService',
+        'AlarmManagerService',
+    )
+    # Формат threadtime: "MM-DD HH:MM:SS.mmm  PID  TID L Tag: сообщение"
+    LOGCAT_TAG_PATTERN = re.compile(rb'^\S+\s+\S+\s+\d+\s+\d+\s+[VDIWEFA]\s+(.*?)\s*: ')
+
+    def __init__(self, manage_adb: bool = True):
+        """
+        Args:
+            manage_adb (bool): Управлять локальным сервером ADB: найти adb,
+                запустить супервизор и завершить процессы ADB при выходе.
+                CLI работает с устройствами напрямую по TCP и передает False
+        """
+        self.current_path = Path.cwd()
+        self.keys_folder = self.current_path / 'keys'
+        self._setup_logging()
+        self._adb_path: Optional[str] = None
+        self.process_manager: Optional[ADBProcessManager] = None
+        self.adb_server: Optional[ADBServerSupervisor] = None
+        if manage_adb:
+            self._adb_path = self.get_adb_path()
+            self.process_manager = ADBProcessManager(self._adb_path)
+            self.adb_server = ADBServerSupervisor(self._adb_path)
+        self.device = None
+        self.session_pool = DeviceSessionPool()
+        self.max_connection_retries = 5
+        self.connection_retry_delay = 5
+        self.connection_timeout = 120  # Таймаут ожидания подключения в секундах
+        self.connection_poll_interval = 1  # Пауза между попытками, если устройство недоступно
+        self.signer_backend = 'cryptography'  # Реализация RSA-подписи, см. SIGNER_BACKENDS
+        self.fleet_max_workers = 32  # Количество одновременно обрабатываемых устройств
+        self.fleet_connect_timeout = 30  # Таймаут подключения к одному устройству в режиме парка
+        self.fleet_async_concurrency = 256  # Лимит одновременных сессий в асинхронном режиме парка
+        self.logcat_idle_timeout = 24 * 3600  # Допустимая пауза без новых данных logcat (сокет и пакеты ADB), сек
+        self.drift_interval = 60  # Интервал измерения часов одного устройства, сек
+        self.drift_threshold_ms = 1000  # Порог предупреждения о расхождении часов, мс
+        self.drift_connect_timeout = 5  # Таймаут единственной попытки подключения при измерении, сек
+        self.drift_reference_server = 'pool.ntp.org'  # Эталонный сервер NTP для ПК
+        self.servers_file = self.current_path / 'saved_servers.json'
+        self.device_cache = DevicePropertyCache(self.current_path / 'device_cache.json')
+        self.dns_cache = DNSRecordCache()  # Записи NTP-серверов для повторных проверок
+        self.probe_cache_ttl = 3600  # Время жизни результатов проверки NTP в секундах
+        self.saved_servers = self.load_saved_servers()
+        self.ntp_servers = {
+            'at': 'at.pool.ntp.org',
+            'ba': 'ba.pool.ntp.org',
+            'be': 'be.pool.ntp.org',
+            'bg': 'bg.pool.ntp.org',
+            'by': 'by.pool.ntp.org',
+            'ch': 'ch.pool.ntp.org',
+            'cy': 'cy.pool.ntp.org',
+            'cz': 'cz.pool.ntp.org',
+            'de': 'de.pool.ntp.org',
+            'dk': 'dk.pool.ntp.org',
+            'ee': 'ee.pool.ntp.org',
+            'es': 'es.pool.ntp.org',
+            'fi': 'fi.pool.ntp.org',
+            'fr': 'fr.pool.ntp.org',
+            'gi': 'gi.pool.ntp.org',
+            'gr': 'gr.pool.ntp.org',
+            'hr': 'hr.pool.ntp.org',
+            'hu': 'hu.pool.ntp.org',
+            'ie': 'ie.pool.ntp.org',
+            'is': 'is.pool.ntp.org',
+            'it': 'it.pool.ntp.org',
+            'li': 'li.pool.ntp.org',
+            'lt': 'lt.pool.ntp.org',
+            'lu': 'lu.pool.ntp.org',
+            'lv': 'lv.pool.ntp.org',
+            'md': 'md.pool.ntp.org',
+            'mk': 'mk.pool.ntp.org',
+            'nl': 'nl.pool.ntp.org',
+            'no': 'no.pool.ntp.org',
+            'pl': 'pl.pool.ntp.org',
+            'pt': 'pt.pool.ntp.org',
+            'ro': 'ro.pool.ntp.org',
+            'rs': 'rs.pool.ntp.org',
+            'ru': 'ru.pool.ntp.org',
+            'se': 'se.pool.ntp.org',
+            'si': 'si.pool.ntp.org',
+            'sk': 'sk.pool.ntp.org',
+            'tr': 'tr.pool.ntp.org',
+            'uk': 'uk.pool.ntp.org',
+            'us': 'us.pool.ntp.org',
+            'ca': 'ca.pool.ntp.org',
+            'br': 'br.pool.ntp.org',
+            'au': 'au.pool.ntp.org',
+            'jp': 'jp.pool.ntp.org',
+            'kz': 'kz.pool.ntp.org',
+            'ae': 'ae.pool.ntp.org',
+            'am': 'am.pool.ntp.org',
+            'az': 'az.pool.ntp.org',
+            'bd': 'bd.pool.ntp.org',
+            'bh': 'bh.pool.ntp.org',
+            'cn': 'cn.pool.ntp.org',
+            'ge': 'ge.pool.ntp.org',
+            'hk': 'hk.pool.ntp.org',
+            'id': 'id.pool.ntp.org',
+            'il': 'il.pool.ntp.org',
+            'in': 'in.pool.ntp.org',
+            'ir': 'ir.pool.ntp.org',
+            'jp': 'jp.pool.ntp.org',
+            'kg': 'kg.pool.ntp.org',
+            'kh': 'kh.pool.ntp.org',
+            'kr': 'kr.pool.ntp.org',
+            'kz': 'kz.pool.ntp.org',
+            'lk': 'lk.pool.ntp.org',
+            'mn': 'mn.pool.ntp.org',
+            'mv': 'mv.pool.ntp.org',
+            'my': 'my.pool.ntp.org',
+            'np': 'np.pool.ntp.org',
+            'ph': 'ph.pool.ntp.org',
+            'pk': 'pk.pool.ntp.org',
+            'ps': 'ps.pool.ntp.org',
+            'qa': 'qa.pool.ntp.org',
+            'sa': 'sa.pool.ntp.org',
+            'sg': 'sg.pool.ntp.org',
+            'th': 'th.pool.ntp.org',
+            'tj': 'tj.pool.ntp.org',
+            'tw': 'tw.pool.ntp.org',
+            'uz': 'uz.pool.ntp.org',
+            'ua': 'ua.pool.ntp.org',
+            'vn': 'vn.pool.ntp.org'
+        }
+        self.custom_ntp_servers = [
+            'time.windows.com',
+            'twc.trafficmanager.net',
+            '0.europe.pool.ntp.org',
+            '1.europe.pool.ntp.org',
+            '2.europe.pool.ntp.org',
+            '3.europe.pool.ntp.org',
+            '0.north-america.pool.ntp.org',
+            '1.north-america.pool.ntp.org',
+            '2.north-america.pool.ntp.org',
+            '3.north-america.pool.ntp.org',
+            '0.asia.pool.ntp.org',
+            '1.asia.pool.ntp.org',
+            '2.asia.pool.ntp.org',
+            '3.asia.pool.ntp.org',
+            '0.africa.pool.ntp.org',
+            '1.africa.pool.ntp.org',
+            '2.africa.pool.ntp.org',
+            '3.africa.pool.ntp.org',
+            '0.oceania.pool.ntp.org',
+            '1.oceania.pool.ntp.org',
+            '2.oceania.pool.ntp.org',
+            '3.oceania.pool.ntp.org',
+            '0.south-america.pool.ntp.org',
+            '1.south-america.pool.ntp.org',
+            '2.south-america.pool.ntp.org',
+            '3.south-america.pool.ntp.org',
+            'time.cloudflare.com',
+            'clock.isc.org',
+            'ntp2.vniiftri.ru',
+            'ntps1-1.cs.tu-berlin.de',
+            'ntp.ix.ru',
+            'time.google.com',
+            'time.android.com'
+        ]
+
+    def _setup_logging(self) -> None:
+        """Настраивает логирование для класса"""
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s',
+            handlers=[
+                logging.FileHandler('android_tv_fixer.log', encoding='utf-8'),
+                logging.StreamHandler()
+            ]
+        )
+        self.logger = logging.getLogger(__name__)
+
+    def get_adb_path(self) -> str:
+        """
+        Получает путь к ADB из runtime hook или ресурсов
+        
+        Returns:
+            str: Полный путь к исполняемому файлу ADB
+            
+        Raises:
+            FileNotFoundError: Если файл ADB не найден
+        """
+        if self._adb_path:
+            return self._adb_path
+
+        try:
+            # Пытаемся импортировать из hook'ов
+            try:
+                from hooks.win_hook import ADB_PATH
+                self._adb_path = ADB_PATH
+            except ImportError:
+                from hooks.linux_hook import ADB_PATH
+                self._adb_path = ADB_PATH
+        except ImportError:
+            # Fallback для разработки
+            if getattr(sys, 'frozen', False):
+                base_path = sys._MEIPASS
+            else:
+                base_path = os.path.abspath(os.path.dirname(__file__))
+            
+            self._adb_path = os.path.join(
+                base_path, 
+                'resources', 
+                'adb.exe' if sys.platform == 'win32' else 'adb'
+            )
+
+        if not os.path.exists(self._adb_path):
+            raise FileNotFoundError(f"ADB не найден по пути: {self._adb_path}")
+
+        self.logger.info(f"Используется ADB по пути: {self._adb_path}")
+        return self._adb_path
+
+    def _process_command_output(self, process: Popen, encoding: Optional[str] = None,
+                                tail_lines: int = 1000) -> Tuple[int, str, str]:
+        """
+        Обрабатывает вывод команды и возвращает результат
+
+        stdout и stderr читаются одновременно в отдельных потоках крупными блоками,
+        декодируются инкрементально, stdout выводится в консоль пакетами.
+        В памяти хранятся только последние tail_lines строк каждого потока.
+
+        Args:
+            process (Popen): Процесс для обработки (каналы в бинарном режиме)
+            encoding (str): Кодировка вывода (по умолчанию cp866 в Windows, иначе utf-8)
+            tail_lines (int): Размер кольцевого буфера строк
+
+        Returns:
+            Tuple[int, str, str]: (код возврата, последние строки stdout, последние строки stderr)
+        """
+        import io
+        import codecs
+        import queue
+
+        if encoding is None:
+            encoding = 'cp866' if sys.platform == 'win32' else 'utf-8'
+
+        chunks: queue.Queue = queue.Queue()
+        streams = {'stdout': process.stdout, 'stderr': process.stderr}
+        tails = {name: _LineRingBuffer(tail_lines) for name in streams}
+
+        def reader(name: str, stream) -> None:
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(encoding)('replace'), translate=True
+            )
+            try:
+                fd = stream.fileno()
+                while True:
+                    data = os.read(fd, self.OUTPUT_CHUNK_SIZE)
+                    if not data:
+                        break
+                    chunks.put((name, decoder.decode(data)))
+            except (OSError, ValueError) as e:
+                self.logger.debug(f"Error reading {name}: {e}")
+            finally:
+                # Остаток декодера (неполная строка, завершающий \r) отдается и при ошибке чтения
+                chunks.put((name, decoder.decode(b'', final=True)))
+                chunks.put((name, None))
+
+        readers = [
+            threading.Thread(target=reader, args=(name, stream), daemon=True)
+            for name, stream in streams.items() if stream is not None
+        ]
+        for thread in readers:
+            thread.start()
+
+        active = len(readers)
+        while active:
+            # Ждем первый блок, затем забираем все накопившиеся и выводим их одной записью
+            batch = [chunks.get()]
+            while len(batch) < 256:
+                try:
+                    batch.append(chunks.get_nowait())
+                except queue.Empty:
+                    break
+
+            console = []
+            for name, text in batch:
+                if text is None:
+                    active -= 1
+                elif text:
+                    tails[name].feed(text)
+                    if name == 'stdout':
+                        console.append(text)
+            if console:
+                sys.stdout.write(Fore.GREEN + ''.join(console))
+                sys.stdout.flush()
+
+        try:
+            return_code = process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            raise TimeoutError("Command execution timeout exceeded")
+
+        return return_code, tails['stdout'].text(), tails['stderr'].text()
+
+    def _retry_adb_connection(self, command: str, max_retries: int = 5, delay: int = 2) -> bool:
         """
-        import time
-        import shlex
-        from subprocess import Popen, PIPE
-        import sys
-        import locale
-        import re
+        Пытается переподключиться к устройству несколько раз. На 3-й, 4-й и 5-й попытке выполняет
+        'adb disconnect' и перезапускает сервер ADB, если он не отвечает на host:version.
+        Использует порт 5555 по умолчанию.
+    
+        Args:
+            command (str): Выполняемая команда.
+            max_retries (int): Максимальное количество попыток (по умолчанию 5).
+            delay (int): Задержка между попытками в секундах (по умолчанию 2).
     
+        Returns:
+            bool: True, если подключение успешно, False в противном случае.
+        """
         # Определяем кодировку текущей системы
         encoding = 'utf-8' if sys.platform != 'win32' else 'cp866'
     
@@ -540,28 +2155,20 @@ class AndroidTVTimeFixer:
         else:
             device_ip = None
     
+        # Сервер запускается один раз и переиспользуется между командами
+        self.adb_server.ensure_running()
+
         for attempt in range(max_retries):
             try:
-                # Выполнение команд adb kill-server и adb disconnect только на 3-й, 4-й и 5-й попытке
+                # На 3-й, 4-й и 5-й попытке сервер перезапускается, только если он не отвечает,
+                # и выполняется adb disconnect
                 if attempt >= 2:
-                    self.logger.info(f"Попытка {attempt + 1}: Execute 'adb kill-server' to restart the ADB server.")
-                    
-                    # Выполняем adb kill-server
-                    kill_server_command = [self.get_adb_path(), 'kill-server']
-                    kill_server_process = Popen(
-                        kill_server_command,
-                        stdout=PIPE,
-                        stderr=PIPE,
-                        universal_newlines=True,
-                        encoding=encoding,
-                        bufsize=1
-                    )
-                    _, kill_server_stderr = kill_server_process.communicate()
-    
-                    if kill_server_process.returncode != 0:
-                        self.logger.warning(f"Error while executing 'adb kill-server': {kill_server_stderr.strip()}")
-                    else:
-                        self.logger.info("'adb kill-server' completed successfully.")
+                    if not self.adb_server.is_healthy():
+                        self.logger.info(f"Попытка {attempt + 1}: ADB server is not responding, restarting it.")
+                        if self.adb_server.restart():
+                            self.logger.info("ADB server restarted successfully.")
+                        else:
+                            self.logger.warning("ADB server did not respond after restart.")
     
                     # Выполняем adb disconnect для конкретного IP, если он есть
                     if device_ip:
@@ -590,16 +2197,9 @@ class AndroidTVTimeFixer:
                 if args[0] == 'adb':
                     args[0] = self.get_adb_path()
     
-                process = Popen(
-                    args,
-                    stdout=PIPE,
-                    stderr=PIPE,
-                    universal_newlines=True,
-                    encoding=encoding,
-                    bufsize=1
-                )
+                process = Popen(args, stdout=PIPE, stderr=PIPE)
     
-                return_code, stdout, stderr = self._process_command_output(process)
+                return_code, stdout, stderr = self._process_command_output(process, encoding)
     
                 # Проверяем наличие ошибок подключения
                 connection_errors = [
@@ -639,6 +2239,86 @@ class AndroidTVTimeFixer:
     
         return False
     
+    def _execute_native_adb(self, command: str) -> bool:
+        """
+        Выполняет команду adb через протокол сервера ADB без запуска процесса
+
+        Поддерживаются devices, connect, disconnect и shell с командой
+        (с необязательным -s <serial>).
+
+        Args:
+            command (str): Команда терминала
+
+        Returns:
+            bool: True, если команда выполнена; False - нужно выполнить ее через процесс adb
+        """
+        import codecs
+
+        try:
+            args = shlex.split(command)
+        except ValueError:
+            return False
+        if not args or args[0] != 'adb':
+            return False
+
+        serial = None
+        args = args[1:]
+        if len(args) >= 2 and args[0] == '-s':
+            serial, args = args[1], args[2:]
+        if not args:
+            return False
+
+        action, params = args[0], args[1:]
+        client = self.adb_server.client
+        try:
+            if action == 'devices' and not params:
+                if not self.adb_server.ensure_running():
+                    return False
+                lines = [f"{device_serial}\t{state}" for device_serial, state in client.devices()]
+                print(Fore.GREEN + '\n'.join(["List of devices attached"] + lines))
+            elif action == 'connect' and len(params) == 1:
+                if not self.adb_server.ensure_running():
+                    return False
+                message = client.connect(params[0])
+                if 'connected to' not in message:
+                    self.logger.info(f"Native connect failed: {message}")
+                    return False
+                print(Fore.GREEN + message)
+            elif action == 'disconnect' and len(params) <= 1:
+                if not self.adb_server.ensure_running():
+                    return False
+                print(Fore.GREEN + client.disconnect(params[0] if params else ''))
+            elif action == 'shell' and params and not params[0].startswith('-'):
+                if not self.adb_server.ensure_running():
+                    return False
+                decoder = codecs.getincrementaldecoder('utf-8')('replace')
+                last_text = ['\n']
+
+                def write_chunk(chunk: bytes, final: bool = False) -> None:
+                    text = decoder.decode(chunk, final)
+                    if text:
+                        last_text[0] = text
+                        sys.stdout.write(Fore.GREEN + text)
+                        sys.stdout.flush()
+
+                client.shell(' '.join(params), serial=serial, on_chunk=write_chunk)
+                write_chunk(b'', final=True)
+                sys.stdout.write(Style.RESET_ALL + ('' if last_text[0].endswith('\n') else '\n'))
+            else:
+                return False
+        except ADBStreamError as e:
+            # Команда уже выполняется на устройстве: повтор через процесс adb запустил бы ее дважды
+            sys.stdout.write(Style.RESET_ALL + '\n')
+            self.logger.error(f"Native ADB shell failed after the command was accepted: {e}")
+            print(Fore.RED + locales.get("command_execution_error", error=str(e)))
+            return True
+        except (OSError, ADBHostError) as e:
+            self.logger.info(f"Native ADB command failed, falling back to adb process: {e}")
+            return False
+
+        self.logger.debug(f"Executed via ADB server protocol: {command}")
+        return True
+
     def execute_terminal_command(self, command: str) -> None:
         """
         Выполняет команду в терминале и выводит результат
@@ -652,6 +2332,10 @@ class AndroidTVTimeFixer:
         try:
             # Пробуем выполнить команду с автоматическими попытками переподключения
             if 'adb' in command:
+                # devices/connect/disconnect/shell выполняются напрямую через сервер ADB,
+                # остальные команды и неудачные попытки - через процесс adb
+                if self._execute_native_adb(command):
+                    return
                 connection_success = self._retry_adb_connection(command)
                 if not connection_success:
                     return
@@ -663,14 +2347,7 @@ class AndroidTVTimeFixer:
     
                 self.logger.debug(f"The command is being executed: {' '.join(args)}")
                 
-                process = Popen(
-                    args,
-                    stdout=PIPE,
-                    stderr=PIPE,
-                    universal_newlines=True,
-                    encoding='utf-8' if sys.platform != 'win32' else 'cp866',
-                    bufsize=1
-                )
+                process = Popen(args, stdout=PIPE, stderr=PIPE)
                 
                 return_code, stdout, stderr = self._process_command_output(process)
                 
@@ -704,8 +2381,11 @@ class AndroidTVTimeFixer:
         print(Fore.GREEN + locales.get("terminal_mode_welcome"))
         print(Fore.YELLOW + locales.get("terminal_mode_help"))
         
-        # Выполняем завершение процессов ADB при входе в терминальный режим
-        self.process_manager.terminate_adb_processes()
+        # Сервер ADB может быть запущен снова, поэтому при выходе его нужно завершить еще раз
+        self.process_manager.rearm()
+        # Сервер ADB не перезапускается при входе: используется уже запущенный, если он отвечает
+        if not self.adb_server.ensure_running():
+            self.logger.warning("ADB server is not available, commands will start it on demand")
 
         try:
             while True:
@@ -749,102 +2429,348 @@ class AndroidTVTimeFixer:
 	
     def ping_ntp_servers(self, timeout=2, count=3):
         """
-        Check NTP servers reliability using ntplib with enhanced error handling
-        
+        Check NTP servers reliability using concurrent asyncio UDP probes
+
         Args:
             timeout (int): Timeout for NTP server connection in seconds
             count (int): Number of attempts to connect to each server
+
+        Returns:
+            list: Ranked probe results, reachable servers first
         """
         print(Fore.GREEN + locales.get("ping_ntp_servers_start"))
         
         # Combine country NTP servers and custom NTP servers
         all_servers = list(self.ntp_servers.values()) + self.custom_ntp_servers
         
+        # All probes are sent at once under a global deadline
+        probe_engine = NTPProbeEngine(timeout=timeout, count=count, resolver=self.dns_cache)
+        probe_results = probe_engine.run(all_servers)
+        
+        server_ping_results = self._summarize_probe_results(probe_results, count)
+        self.save_probe_results(server_ping_results)
+        self._print_probe_table(server_ping_results)
+
+        return server_ping_results
+
+    def _summarize_probe_results(self, probe_results: Dict[str, List[dict]], count: int) -> List[dict]:
+        """
+        Сводит попытки опроса по каждому адресу сервера в ранжированную таблицу
+
+        Args:
+            probe_results (Dict[str, List[dict]]): Попытки опроса для каждого сервера
+            count (int): Количество попыток на сервер; для адресов пула доля
+                ответов считается от числа отправленных на адрес попыток
+
+        Returns:
+            List[dict]: Результаты по адресам, доступные серверы первыми
+        """
         server_ping_results = []
         
-        for server in all_servers:
-            server_attempts = []
-            
-            for _ in range(count):
-                try:
-                    # Create NTP client
-                    ntp_client = ntplib.NTPClient()
-                    
-                    # Attempt to retrieve NTP time
-                    start_time = time.time()
-                    ntp_response = ntp_client.request(server, version=3, timeout=timeout)
-                    end_time = time.time()
-                    
-                    # Calculate round trip time
-                    rtt = (end_time - start_time) * 1000  # Convert to milliseconds
-                    
-                    server_attempts.append({
-                        'status': 'Successful',
-                        'rtt': rtt
-                    })
-                
-                except ntplib.NTPException as e:
-                    server_attempts.append({
-                        'status': 'NTP Protocol Error',
-                        'error': str(e)
-                    })
-                except socket.gaierror:
-                    server_attempts.append({
-                        'status': 'DNS Resolution Error',
-                        'error': 'Could not resolve server hostname'
-                    })
-                except socket.timeout:
-                    server_attempts.append({
-                        'status': 'Timeout',
-                        'error': 'Connection timed out'
-                    })
-                except Exception as e:
-                    server_attempts.append({
-                        'status': 'Unexpected Error',
-                        'error': str(e)
-                    })
-            
+        for server, address, server_attempts in self._group_attempts_by_address(probe_results):
             # Analyze server performance
+            first = server_attempts[0] if server_attempts else {}
+            dns = {
+                'address': address,
+                'dns_latency': first.get('dns_latency'),
+                'dns_cached': first.get('dns_cached')
+            }
             successful_attempts = [attempt for attempt in server_attempts if attempt['status'] == 'Successful']
             
             if successful_attempts:
-                avg_rtt = sum(attempt['rtt'] for attempt in successful_attempts) / len(successful_attempts)
-                success_rate = (len(successful_attempts) / count) * 100
+                # Попытки без измеренного времени (date без %N) учитываются только в доле ответов
+                timed = [attempt['rtt'] for attempt in successful_attempts if attempt['rtt'] is not None]
+                avg_rtt = sum(timed) / len(timed) if timed else None
+                # Попытки по адресам распределены между адресами сервера
+                attempted = len(server_attempts) if address is not None else count
+                success_rate = (len(successful_attempts) / attempted) * 100
+                quality = self._probe_quality(successful_attempts)
+                synchronized = quality['synchronized'] is not False
                 
                 server_ping_results.append({
                     'server': server,
-                    'status': 'Reachable',
+                    **dns,
+                    'status': 'Reachable' if synchronized else 'Unsynchronized',
                     'avg_rtt': avg_rtt,
                     'success_rate': success_rate,
-                    'color': Fore.GREEN if success_rate > 66 else Fore.YELLOW
+                    **quality,
+                    'color': Fore.GREEN if synchronized and success_rate > 66 else Fore.YELLOW
                 })
             else:
                 server_ping_results.append({
                     'server': server,
+                    **dns,
                     'status': 'Unreachable',
                     'avg_rtt': None,
                     'success_rate': 0,
+                    **self._probe_quality([]),
                     'color': Fore.RED
                 })
         
-        # Sort results: reachable servers first, sorted by success rate and avg RTT
-        server_ping_results.sort(
-            key=lambda x: (x['status'] != 'Reachable', -x['success_rate'], x['avg_rtt'] or float('inf'))
+        # Sort results: synchronized servers first, sorted by success rate and delay + dispersion
+        server_ping_results.sort(key=self._ranking_key)
+        return server_ping_results
+
+    @staticmethod
+    def _group_attempts_by_address(probe_results: Dict[str, List[dict]]) -> List[Tuple[str, Optional[str], List[dict]]]:
+        """
+        Разбивает попытки сервера по адресам, на которые они отправлены
+
+        Попытки без адреса (ошибка DNS, проверка с устройства) образуют
+        одну группу с адресом None.
+
+        Returns:
+            List[Tuple[str, Optional[str], List[dict]]]: (сервер, адрес, попытки)
+        """
+        groups = []
+        for server, server_attempts in probe_results.items():
+            # Сервер без попыток (нет строк в выводе устройства) - недоступен
+            by_address: Dict[Optional[str], List[dict]] = {} if server_attempts else {None: []}
+            for attempt in server_attempts:
+                by_address.setdefault(attempt.get('address'), []).append(attempt)
+            groups.extend((server, address, attempts) for address, attempts in by_address.items())
+        return groups
+
+    @staticmethod
+    def _probe_quality(successful_attempts: List[dict]) -> dict:
+        """
+        Выбирает показатели качества сервера по попытке с минимальной задержкой
+
+        Как и фильтр часов NTP, берет ответ с наименьшим delay: в нем меньше
+        всего очередей и асимметрии маршрута. Попытки без полей NTP (проверка
+        с устройства) дают None.
+
+        Args:
+            successful_attempts (List[dict]): Успешные попытки опроса сервера
+
+        Returns:
+            dict: delay, offset, root_dispersion (мс), stratum, leap,
+                synchronized и score - delay + root_dispersion для ранжирования
+        """
+        measured = [attempt for attempt in successful_attempts if attempt.get('delay') is not None]
+        if not measured:
+            return {
+                'delay': None, 'offset': None, 'root_dispersion': None,
+                'stratum': None, 'leap': None, 'synchronized': None, 'score': None
+            }
+
+        best = min(measured, key=lambda attempt: attempt['delay'])
+        # Stratum 0 - kiss-of-death, 16 - сервер не синхронизирован; leap 3 - часы не установлены
+        synchronized = 1 <= best['stratum'] <= 15 and best['leap'] != 3
+        return {
+            'delay': best['delay'],
+            'offset': best['offset'],
+            'root_dispersion': best['root_dispersion'],
+            'stratum': best['stratum'],
+            'leap': best['leap'],
+            'synchronized': synchronized,
+            'score': best['delay'] + best['root_dispersion']
+        }
+
+    def _print_probe_table(self, server_ping_results: List[dict]) -> None:
+        """Выводит таблицу результатов проверки серверов"""
+        def number(value, suffix="", digits=2):
+            return f"{value:.{digits}f}{suffix}" if value is not None else "N/A"
+
+        print(
+            Fore.YELLOW +
+            f"{'Server':<25} {'Address':<16} {'Status':<15} {'DNS (ms)':>9} {'RTT (ms)':>9} "
+            f"{'Delay (ms)':>11} {'Offset (ms)':>12} {'Disp (ms)':>10} {'Stratum':>8} {'Success':>8}"
         )
-        
-        # Display results
-        print(Fore.YELLOW + f"{'Server':<25} {'Status':<15} {'Avg RTT (ms)':<15} {'Success Rate':<15}")
-        print("-" * 70)
+        print("-" * 130)
         
         for result in server_ping_results:
-            rtt_display = f"{result['avg_rtt']:.2f}" if result['avg_rtt'] is not None else "N/A"
-            success_rate_display = f"{result['success_rate']:.2f}%" if result['success_rate'] is not None else "N/A"
-            
+            stratum = result.get('stratum')
+            # Время DNS из кэша помечается звездочкой: в этой проверке запроса не было
+            dns_display = number(result.get('dns_latency')) + ("*" if result.get('dns_cached') else "")
             print(
                 result['color'] + 
-                f"{result['server']:<25} {result['status']:<15} {rtt_display:<15} {success_rate_display:<15}"
+                f"{result['server']:<25} {result.get('address') or 'N/A':<16} {result['status']:<15} "
+                f"{dns_display:>9} {number(result['avg_rtt']):>9} "
+                f"{number(result.get('delay')):>11} {number(result.get('offset')):>12} "
+                f"{number(result.get('root_dispersion')):>10} "
+                f"{stratum if stratum is not None else 'N/A':>8} "
+                f"{number(result['success_rate'], '%', 0):>8}"
             )
-	
+
+    def ping_ntp_servers_from_device(self, timeout=2, count=3, wave_size=64):
+        """
+        Проверяет NTP-серверы с самого устройства через toybox nc
+
+        Запросы выполняются на ТВ параллельно (волнами по wave_size
+        процессов) в рамках одного вызова shell, поэтому результат
+        отражает сеть устройства, а не ПК.
+
+        Args:
+            timeout (int): Таймаут ожидания ответа в секундах
+            count (int): Количество запросов к каждому серверу
+            wave_size (int): Сколько запросов одновременно запускается на устройстве
+
+        Returns:
+            list: Ранжированные результаты в формате ping_ntp_servers
+        """
+        if not self.device:
+            raise AndroidTVTimeFixerError(locales.get("no_device_connected"))
+
+        print(Fore.GREEN + locales.get("ping_ntp_servers_from_device_start"))
+        all_servers = list(dict.fromkeys(list(self.ntp_servers.values()) + self.custom_ntp_servers))
+        servers_per_wave = max(1, wave_size // count)
+        waves = (len(all_servers) + servers_per_wave - 1) // servers_per_wave
+
+        # Каждая попытка: 48-байтный NTP-запрос через nc, ответ считается по числу байт,
+        # время фиксируется сразу после получения ответа, до выхода nc по таймауту
+        script = "\n".join([
+            "command -v nc >/dev/null 2>&1 || { echo ATF_NO_NC; exit 0; }",
+            f"T={int(timeout)}",
+            "p() {",
+            "  s=$(date +%s%N)",
+            "  { printf '\\033'; head -c 47 /dev/zero; sleep $T; } |",
+            "    timeout $T nc -u \"$1\" 123 2>/dev/null |",
+            "    { n=$(head -c 48 | wc -c); echo \"ATF $2 $s $(date +%s%N) $n\"; }",
+            "}",
+            "i=0",
+            "for h in " + " ".join(shlex.quote(server) for server in all_servers) + "; do",
+            f"  for a in {' '.join(str(attempt) for attempt in range(count))}; do p \"$h\" $i & done",
+            "  i=$((i + 1))",
+            f"  [ $((i % {servers_per_wave})) -eq 0 ] && wait",
+            "done",
+            "wait",
+        ])
+
+        try:
+            output = self.device.shell(
+                f"sh -c {shlex.quote(script)}",
+                # Строки результатов приходят не чаще раза в волну: пауза в сокете
+                # может превышать таймаут сессии 9 с
+                transport_timeout_s=timeout + 10,
+                read_timeout_s=waves * (timeout + 5) + 10,
+                timeout_s=waves * (timeout + 5) + 30
+            )
+        except Exception as e:
+            raise AndroidTVTimeFixerError(locales.get("device_probe_error", error=str(e)))
+
+        if 'ATF_NO_NC' in output:
+            raise AndroidTVTimeFixerError(locales.get("device_probe_unsupported"))
+
+        probe_results: Dict[str, List[dict]] = {server: [] for server in all_servers}
+        for line in output.splitlines():
+            fields = line.split()
+            if len(fields) != 5 or fields[0] != 'ATF':
+                continue
+            try:
+                server = all_servers[int(fields[1])]
+            except (ValueError, IndexError):
+                continue
+            if fields[4] == '48':
+                try:
+                    rtt = (int(fields[3]) - int(fields[2])) / 1e6
+                except ValueError:
+                    # date без поддержки %N: ответ получен, но время неизвестно
+                    rtt = None
+                probe_results[server].append({'status': 'Successful', 'rtt': rtt})
+            else:
+                probe_results[server].append({'status': 'Timeout', 'error': 'No response from device probe'})
+
+        server_ping_results = self._summarize_probe_results(probe_results, count)
+        self._print_probe_table(server_ping_results)
+        return server_ping_results
+
+    def capture_logcat(self, tags: Optional[Tuple[str, ...]] = None, output_dir: Optional[Path] = None,
+                       max_bytes: int = 64 * 1024 * 1024, compression: str = 'gzip') -> dict:
+        """
+        Записывает logcat подключенного устройства в сжатые файлы с ротацией
+
+        Вывод читается потоком через streaming_shell, строки фильтруются по тегам
+        по мере поступления и сразу пишутся в файл, без накопления в памяти.
+        Запись продолжается до Ctrl+C или закрытия потока устройством.
+
+        Args:
+            tags (tuple): Теги logcat для сохранения (пустой кортеж - все строки)
+            output_dir (Path): Папка для файлов (по умолчанию ./logcat)
+            max_bytes (int): Объем несжатых данных в одном файле
+            compression (str): 'gzip' или 'zstd'
+
+        Returns:
+            dict: Статистика: lines, matched, bytes, files
+        """
+        if not self.device:
+            raise AndroidTVTimeFixerError(locales.get("no_device_connected"))
+
+        tags = self.LOGCAT_TIME_TAGS if tags is None else tags
+        tag_filter = {tag.encode() for tag in tags}
+        output_dir = output_dir or self.current_path / 'logcat'
+        prefix = f"logcat_{self.device.ip.replace('.', '_')}_{time.strftime('%Y%m%d_%H%M%S')}"
+        stats = {'lines': 0, 'matched': 0, 'bytes': 0, 'files': []}
+
+        print(Fore.GREEN + locales.get(
+            "logcat_started",
+            tags=', '.join(tags) if tags else locales.get("logcat_all_tags"),
+            path=output_dir
+        ))
+
+        # На время записи Ctrl+C должен останавливать запись, а не завершать программу
+        previous_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+        partial = b''
+        try:
+            with RotatingCompressedWriter(output_dir, prefix, max_bytes, compression) as writer:
+                try:
+                    for chunk in self.device.streaming_shell(
+                        'logcat -v threadtime',
+                        # transport_timeout_s ограничивает одно чтение из сокета: без него
+                        # действует таймаут сессии 9 с, и тихое устройство обрывает запись
+                        transport_timeout_s=self.logcat_idle_timeout,
+                        read_timeout_s=self.logcat_idle_timeout,
+                        decode=False
+                    ):
+                        lines = (partial + chunk).split(b'\n')
+                        partial = lines.pop()
+                        stats['lines'] += len(lines)
+                        if tag_filter:
+                            lines = [
+                                line for line in lines
+                                if (match := self.LOGCAT_TAG_PATTERN.match(line))
+                                and match.group(1) in tag_filter
+                            ]
+                        if lines:
+                            data = b'\n'.join(lines) + b'\n'
+                            writer.write(data)
+                            stats['matched'] += len(lines)
+                            stats['bytes'] += len(data)
+                    # Поток закрыт устройством штатно, сессию можно использовать дальше
+                    stream_closed = True
+                    # Последняя строка без завершающего перевода строки
+                    if partial:
+                        stats['lines'] += 1
+                        match = self.LOGCAT_TAG_PATTERN.match(partial)
+                        if not tag_filter or (match and match.group(1) in tag_filter):
+                            data = partial + b'\n'
+                            writer.write(data)
+                            stats['matched'] += 1
+                            stats['bytes'] += len(data)
+                        partial = b''
+                except KeyboardInterrupt:
+                    stream_closed = False
+                except Exception as e:
+                    stream_closed = False
+                    self.logger.error(f"Logcat capture error: {e}")
+                    print(Fore.RED + locales.get("logcat_error", error=str(e)))
+                if not stream_closed:
+                    # Незакрытый поток logcat остается в транспорте - сессия не переиспользуется
+                    self.session_pool.discard(self.device)
+                    self.device = None
+            stats['files'] = [str(path) for path in writer.files]
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+
+        self.logger.info(
+            f"Logcat capture finished: {stats['matched']}/{stats['lines']} lines, "
+            f"{stats['bytes']} bytes, files: {stats['files']}"
+        )
+        print(Fore.GREEN + locales.get(
+            "logcat_stopped", matched=stats['matched'], lines=stats['lines'], files=len(stats['files'])
+        ))
+        return stats
+
     def load_saved_servers(self) -> dict:
         """Загружает сохраненные серверы из файла"""
         if self.servers_file.exists():
@@ -855,6 +2781,81 @@ class AndroidTVTimeFixer:
                 logger.warning(locales.get('logger_warning', error=str(e)))
         return {'favorite_servers': [], 'custom_servers': []}
 
+    @staticmethod
+    def _ranking_key(result: dict) -> tuple:
+        """
+        Ключ сортировки: синхронизированные серверы, измеренные раньше
+        неизмеренных, доля ответов, delay + root_dispersion
+        """
+        status_rank = {'Reachable': 0, 'Unsynchronized': 1}.get(result['status'], 2)
+        # Результаты без метрик NTP (проверка с устройства, старый кэш) ранжируются по RTT
+        score = result.get('score')
+        if score is None:
+            score = result['avg_rtt']
+        return (status_rank, score is None, -result['success_rate'], score if score is not None else float('inf'))
+
+    def save_probe_results(self, results: List[dict]) -> None:
+        """
+        Сохраняет результаты проверки серверов с отметкой времени
+
+        Для сервера с несколькими адресами сохраняется лучший адрес по рангу.
+        """
+        now = time.time()
+        probe_results = self.saved_servers.setdefault('probe_results', {})
+        saved = set()
+        for result in sorted(results, key=self._ranking_key):
+            if result['server'] in saved:
+                continue
+            saved.add(result['server'])
+            probe_results[result['server']] = {
+                'address': result.get('address'),
+                'status': result['status'],
+                'avg_rtt': result['avg_rtt'],
+                'success_rate': result['success_rate'],
+                'delay': result.get('delay'),
+                'offset': result.get('offset'),
+                'root_dispersion': result.get('root_dispersion'),
+                'stratum': result.get('stratum'),
+                'leap': result.get('leap'),
+                'score': result.get('score'),
+                'dns_latency': result.get('dns_latency'),
+                'timestamp': now
+            }
+        self.save_servers()
+
+    def get_cached_ranking(self) -> List[dict]:
+        """
+        Возвращает сохраненные результаты проверки, не старше probe_cache_ttl
+
+        Returns:
+            List[dict]: Результаты в порядке ранжирования
+        """
+        ttl = self.saved_servers.get('probe_cache_ttl', self.probe_cache_ttl)
+        now = time.time()
+        ranking = [
+            dict(result, server=server)
+            for server, result in self.saved_servers.get('probe_results', {}).items()
+            if now - result.get('timestamp', 0) <= ttl
+        ]
+        ranking.sort(key=self._ranking_key)
+        return ranking
+
+    def suggest_ntp_server(self, country_code: str) -> Optional[dict]:
+        """
+        Предлагает самый быстрый доступный сервер для страны по кэшу проверок
+
+        Кандидаты - сервер страны и альтернативные серверы. Повторная
+        проверка не выполняется; при пустом или устаревшем кэше возвращает None.
+        """
+        candidates = set(self.custom_ntp_servers)
+        if country_code in self.ntp_servers:
+            candidates.add(self.ntp_servers[country_code])
+
+        for result in self.get_cached_ranking():
+            if result['server'] in candidates and result['status'] == 'Reachable':
+                return result
+        return None
+
     def save_servers(self):
         """Сохраняет серверы в файл"""
         try:
@@ -866,6 +2867,7 @@ class AndroidTVTimeFixer:
     def copy_server_to_clipboard(self, server: str) -> bool:
         """Копирует адрес сервера в буфер обмена"""
         try:
+            import pyperclip
             pyperclip.copy(server)
             return True
         except Exception as e:
@@ -875,6 +2877,7 @@ class AndroidTVTimeFixer:
     def paste_server_from_clipboard(self) -> str:
         """Получает адрес сервера из буфера обмена"""
         try:
+            import pyperclip
             return pyperclip.paste()
         except Exception as e:
             logger.warning(locales.get('copy_to_clipboard_2', error=str(e)))
@@ -903,6 +2906,7 @@ class AndroidTVTimeFixer:
             if not self.keys_folder.exists():
                 self.keys_folder.mkdir(parents=True)
                 priv_key = self.keys_folder / 'adbkey'
+                from adb_shell.auth.keygen import keygen
                 keygen(str(priv_key))
                 logger.info(locales.get('gen_keys'))
             else:
@@ -922,6 +2926,28 @@ class AndroidTVTimeFixer:
         except Exception as e:
             raise AndroidTVTimeFixerError(locales.get("key_loading_error", error=str(e)))
 
+    def get_signer(self):
+        """
+        Возвращает RSA-подписчик для авторизации ADB
+
+        Ключи читаются с диска и разбираются один раз за процесс. Если
+        выбранный backend недоступен, используется PythonRSASigner.
+        """
+        cache_key = (str(self.keys_folder), self.signer_backend)
+        with self._signer_lock:
+            signer = self._signer_cache.get(cache_key)
+            if signer is None:
+                pub, priv = self.load_keys()
+                try:
+                    signer = SIGNER_BACKENDS[self.signer_backend](pub, priv)
+                except (KeyError, ImportError) as e:
+                    logger.warning(f"Signer backend '{self.signer_backend}' unavailable ({e}), using pythonrsa")
+                    signer = _python_rsa_signer(pub, priv)
+                except Exception as e:
+                    raise AndroidTVTimeFixerError(locales.get("key_loading_error", error=str(e)))
+                self._signer_cache[cache_key] = signer
+        return signer
+
     def list_devices():
         """Получить список подключенных устройств через adb."""
         result = subprocess.run(['adb', 'devices'], capture_output=True, text=True)
@@ -971,68 +2997,216 @@ class AndroidTVTimeFixer:
         if not self.validate_ip(ip):
             raise AndroidTVTimeFixerError(locales.get("invalid_ip_format"))
 
-        pub, priv = self.load_keys()
-        signer = PythonRSASigner(pub, priv)
+        ip = ip.strip()
+        session = self.session_pool.get(ip)
+        if session is None:
+            session = self._open_session(ip)
+            self.session_pool.put(session)
+        self.device = session
+
+    def _open_session(self, ip: str, port: int = 5555, timeout: Optional[float] = None,
+                      show_progress: bool = True, single_attempt: bool = False) -> DeviceSession:
+        """
+        Открывает новую сессию с устройством, ожидая подтверждения на ТВ
+
+        Используется один транспорт: ожидание подтверждения RSA-ключа идет
+        внутри одного рукопожатия, без повторных подключений, которые
+        создают новые запросы на экране ТВ. Повторные попытки выполняются
+        только когда устройство отклонило подключение или недоступно.
+        Не изменяет self.device, поэтому может вызываться из нескольких потоков.
+
+        Args:
+            ip (str): IP-адрес устройства
+            port (int): Порт ADB
+            timeout (float): Время ожидания подключения, по умолчанию connection_timeout
+            show_progress (bool): Выводить ли состояние подключения в консоль
+            single_attempt (bool): Не повторять подключение после первой неудачи
+
+        Returns:
+            DeviceSession: Сессия с подключенным устройством
+        """
+        timeout = self.connection_timeout if timeout is None else timeout
+        signer = self.get_signer()
         
-        start_time = time.time()
-        connection_established = False
+        deadline = time.monotonic() + timeout
+        from adb_shell.adb_device import AdbDeviceTcp
+
+        adb_device = AdbDeviceTcp(ip, port, default_transport_timeout_s=9.)
+        state = ConnectionState.CONNECTING
         last_error = None
-        
-        print(locales.get("waiting_for_connection"))
-        print(locales.get("confirm_connection"))
-        
-        while time.time() - start_time < self.connection_timeout:
+
+        if show_progress:
+            print(locales.get("waiting_for_connection", remaining_time=int(timeout)), end='')
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            auth_requested = []
+
+            def on_auth_request(_):
+                # Устройство ждет подтверждения ключа на экране
+                auth_requested.append(True)
+                if show_progress:
+                    print()
+                    print(locales.get("confirm_connection"))
+
             try:
-                self.device = AdbDeviceTcp(ip.strip(), 5555, default_transport_timeout_s=9.)
-                self.device.connect(rsa_keys=[signer], auth_timeout_s=15)
-                connection_established = True
+                adb_device.connect(**self._connect_options(signer, remaining, on_auth_request))
+                if show_progress:
+                    print()  # Новая строка после завершения ожидания
                 logger.info(locales.get('connection_success', ip=ip))
-                break
+                return DeviceSession(adb_device, ip, port)
             except Exception as e:
-                last_error = str(e)
-                remaining_time = int(self.connection_timeout - (time.time() - start_time))
-                print(locales.get("waiting_for_connection", remaining_time=remaining_time), end='')
-                time.sleep(1)
+                state, last_error = self._classify_connection_error(e, bool(auth_requested))
+            adb_device.close()
 
-        print()  # Новая строка после завершения ожидания
+            logger.debug(f"Connection to {ip}:{port}: {state.value} ({last_error})")
+            if single_attempt:
+                break
+            remaining = deadline - time.monotonic()
+            if show_progress and remaining > 0:
+                print(locales.get(
+                    f"connection_state_{state.value}",
+                    remaining_time=int(remaining)
+                ), end='')
+            time.sleep(max(0., min(self.connection_poll_interval, remaining)))
+
+        if show_progress:
+            print()  # Новая строка после завершения ожидания
         
-        if not connection_established:
-            raise AndroidTVTimeFixerError(
-                locales.get("connection_failed", timeout=self.connection_timeout) + "\n" +
-                locales.get("ensure_steps") + "\n" +
-                locales.get("last_error", error=last_error)
-            )
+        raise self._connection_error(state, timeout, last_error)
+
+    @staticmethod
+    def _connect_options(signer, remaining: float, auth_callback: Callable) -> dict:
+        """
+        Параметры одного рукопожатия для AdbDeviceTcp и AdbDeviceTcpAsync
+
+        Ожидание подтверждения ключа занимает все оставшееся время, а
+        транспортный таймаут не превышает 9 секунд.
+        """
+        return {
+            'rsa_keys': [signer],
+            'transport_timeout_s': min(9., remaining),
+            'auth_timeout_s': max(remaining, 1.),
+            'auth_callback': auth_callback
+        }
+
+    @staticmethod
+    def _classify_connection_error(error: Exception, auth_requested: bool) -> Tuple[ConnectionState, str]:
+        """
+        Определяет состояние устройства по ошибке подключения
+
+        Args:
+            error (Exception): Ошибка рукопожатия
+            auth_requested (bool): Запрашивало ли устройство подтверждение ключа
+
+        Returns:
+            Tuple[ConnectionState, str]: Состояние и текст ошибки
+        """
+        if isinstance(error, ConnectionRefusedError):
+            return ConnectionState.REFUSED, str(error)
+        state = ConnectionState.UNAUTHORIZED if auth_requested else ConnectionState.OFFLINE
+        return state, str(error) or type(error).__name__
+
+    @staticmethod
+    def _connection_error(state: ConnectionState, timeout: float,
+                          last_error: Optional[str]) -> AndroidTVTimeFixerError:
+        """Формирует ошибку подключения с подсказкой для последнего состояния"""
+        return AndroidTVTimeFixerError(
+            locales.get("connection_failed", timeout=timeout) + "\n" +
+            locales.get(f"connection_hint_{state.value}") + "\n" +
+            locales.get("ensure_steps") + "\n" +
+            locales.get("last_error", error=last_error)
+        )
 
     def get_current_ntp(self) -> str:
         if not self.device:
             raise AndroidTVTimeFixerError(locales.get("no_device_connected"))
 
         try:
-            current_ntp = self.device.shell('settings get global ntp_server')
-            return current_ntp.strip()
+            result = self.device.shell_batch({'ntp_server': 'settings get global ntp_server'})
+            return result['ntp_server']
         except Exception as e:
             raise AndroidTVTimeFixerError(locales.get('failed_to_get_ntp_server', error=str(e)))
 
-    def set_ntp_server(self, ntp_server: str) -> None:
+    def set_ntp_server(self, ntp_server: str) -> NtpApplyResult:
         if not self.device:
             raise AndroidTVTimeFixerError(locales.get('no_device_connected'))
     
+        return self._apply_ntp_server(self.device, ntp_server)
+
+    def _apply_ntp_server(self, session: DeviceSession, ntp_server: str) -> NtpApplyResult:
+        """
+        Идемпотентно устанавливает и проверяет сервер NTP в указанной сессии
+
+        Сравнение, запись (только если значение отличается) и чтение
+        результата выполняются одним вызовом shell.
+
+        Returns:
+            NtpApplyResult: 'changed' или 'unchanged', прежнее и текущее значение
+        """
         try:
-            self.device.shell(f'settings put global ntp_server {ntp_server}')
-            logger.info(locales.get('ntp_server_set', ntp_server=ntp_server))
-    
-            # Проверяем изменение
-            new_ntp = self.get_current_ntp()
-            if ntp_server not in new_ntp:
-                raise AndroidTVTimeFixerError(locales.get("ntp_server_confirmation_failed"))
+            output = session.shell(self._ntp_apply_script(ntp_server))
+            return self._parse_ntp_apply_output(ntp_server, output)
         except Exception as e:
             raise AndroidTVTimeFixerError(locales.get("ntp_server_update_failed", error=str(e)))
-	
-    def fix_time(self, ntp_server: str) -> None:
+
+    @staticmethod
+    def _ntp_apply_script(ntp_server: str) -> str:
+        """Скрипт `sh -c`: запись только при отличии, затем чтение записанного значения"""
+        script = "\n".join([
+            f"t={shlex.quote(ntp_server)}",
+            "p=$(settings get global ntp_server)",
+            'if [ "$p" = "$t" ]; then',
+            "  echo ATF_STATUS unchanged",
+            "  c=$p",
+            "else",
+            '  settings put global ntp_server "$t" 2>&1',
+            "  echo ATF_STATUS changed",
+            "  c=$(settings get global ntp_server)",
+            "fi",
+            'echo "ATF_PREVIOUS $p"',
+            'echo "ATF_CURRENT $c"',
+        ])
+        return f"sh -c {shlex.quote(script)}"
+
+    @staticmethod
+    def _parse_ntp_apply_output(ntp_server: str, output: str) -> NtpApplyResult:
+        """Разбирает вывод _ntp_apply_script и проверяет записанное значение"""
+        fields = {}
+        for line in output.splitlines():
+            tag, _, value = line.partition(' ')
+            if tag in ('ATF_STATUS', 'ATF_PREVIOUS', 'ATF_CURRENT'):
+                fields[tag] = value.strip()
+        if 'ATF_CURRENT' not in fields:
+            raise AndroidTVTimeFixerError(output.strip() or locales.get("ntp_server_confirmation_failed"))
+
+        result = NtpApplyResult(
+            status=fields.get('ATF_STATUS', 'changed'),
+            previous=fields.get('ATF_PREVIOUS'),
+            current=fields['ATF_CURRENT']
+        )
+        if result.current != ntp_server:
+            raise AndroidTVTimeFixerError(locales.get("ntp_server_confirmation_failed"))
+        if result.status == 'unchanged':
+            logger.info(locales.get('ntp_server_unchanged', ntp_server=ntp_server))
+        else:
+            logger.info(locales.get('ntp_server_set', ntp_server=ntp_server))
+        return result
+
+    def fix_time(self, ntp_server: str) -> NtpApplyResult:
         if not self.device:
             raise AndroidTVTimeFixerError(locales.get("no_device_connected"))
         
-        self.set_ntp_server(ntp_server)
+        return self.set_ntp_server(ntp_server)
+
+    @staticmethod
+    def ntp_result_message(applied: NtpApplyResult) -> str:
+        """Сообщение для пользователя по результату установки сервера NTP"""
+        key = 'ntp_server_unchanged' if applied.status == 'unchanged' else 'ntp_server_set'
+        return locales.get(key, ntp_server=applied.current)
 
     def show_country_codes(self) -> None:
         print(Fore.YELLOW + locales.get("available_country_codes"))
@@ -1050,8 +3224,8 @@ class AndroidTVTimeFixer:
             if ntp_server.lower() == 'q':
                 return
             try:
-                self.fix_time(ntp_server)
-                print(Fore.GREEN + locales.get("ntp_server_set", ntp_server=ntp_server))
+                applied = self.fix_time(ntp_server)
+                print(Fore.GREEN + self.ntp_result_message(applied))
                 return
             except AndroidTVTimeFixerError as e:
                 print(locales.get("error_message", error=str(e)))
@@ -1061,48 +3235,67 @@ class AndroidTVTimeFixer:
             raise AndroidTVTimeFixerError(locales.get("no_device_connected"))
 
         try:
-            device_info = {
-                'model': self.device.shell('getprop ro.product.model').strip(),
-                'brand': self.device.shell('getprop ro.product.brand').strip(),
-                'name': self.device.shell('getprop ro.product.name').strip(),
-                'android_version': self.device.shell('getprop ro.build.version.release').strip(),
-                'api_level': self.device.shell('getprop ro.build.version.sdk').strip(),
-                'serial': self.device.shell('getprop ro.serialno').strip(),
-                'serial': self.device.shell('getprop ro.boot.serialno').strip(),
-                'cpu_arch': self.device.shell('getprop ro.product.cpu.abi').strip(),
-                'hardware': self.device.shell('getprop ro.hardware').strip(),
-                #'ip_address': self.device.shell('ip addr show wlan0 | grep "inet "').strip(),
-                #'ip_address': self.device.shell("ip -f inet addr show wlan0 | awk '/inet / {print $2}' | cut -d'/' -f1").strip(),
-                'ip_address': self.device.shell('ip addr show wlan0').strip(),
-                'mac_address': self.device.shell('cat /sys/class/net/wlan0/address').strip(),
-                #'wifi_ssid': self.device.shell('dumpsys wifi | grep "mWifiInfo"').strip(),
-                # Дополнительные сетевые параметры
-                'network_type': self.device.shell('getprop gsm.network.type').strip(),
-                'cellular_operator': self.device.shell('getprop gsm.operator.alpha').strip(),
-                # Информация о подключениях
-                #'active_connections': self.device.shell('netstat -tuln').strip(),
-                'battery_level': self.device.shell('dumpsys battery | grep level').strip(),
-                'battery_status': self.device.shell('dumpsys battery | grep status').strip(),
-                'manufacturer': self.device.shell('getprop ro.product.manufacturer').strip(),
-                'device': self.device.shell('getprop ro.product.device').strip(),
-                'build_id': self.device.shell('getprop ro.build.id').strip(),
-                'build_fingerprint': self.device.shell('getprop ro.build.fingerprint').strip(),
-                'uptime': self.device.shell('cat /proc/uptime').strip(),
-                'total_ram': self.device.shell("cat /proc/meminfo | grep 'MemTotal'").strip(),
-                'available_ram': self.device.shell("cat /proc/meminfo | grep 'MemAvailable'").strip(),
-                'screen_resolution': self.device.shell('wm size').strip(),
-                'screen_density': self.device.shell('wm density').strip(),
-                'timezone': self.device.shell('getprop persist.sys.timezone').strip(),
-                'locale': self.device.shell('getprop persist.sys.locale').strip(),
-                'cpu_cores': self.device.shell('cat /proc/cpuinfo | grep "^processor" | wc -l').strip(),
-                'bootloader_version': self.device.shell('getprop ro.bootloader').strip(),  # Версия загрузчика
-                'baseband_version': self.device.shell('getprop gsm.version.baseband').strip(),
-                'kernel_version': self.device.shell('uname -r').strip(),
-                'secure_boot_status': self.device.shell('getprop ro.boot.secureboot').strip()
-            }
-            return device_info
+            # Первый запрос - дамп getprop и изменяемые поля, не являющиеся свойствами
+            fresh = self.device.shell_batch(self._device_info_commands(volatile=True))
+            snapshot = PropertySnapshot.parse(fresh.pop(self.GETPROP_KEY, ''))
+            static = self._cached_device_info(snapshot)
+            if static is None:
+                static = self.device.shell_batch(self._device_info_commands(volatile=False))
+                self._store_device_info(snapshot, static)
+            return self._merge_device_info(snapshot, fresh, static)
         except Exception as e:
             raise AndroidTVTimeFixerError(locales.get("device_info_error", error=str(e)))
+
+    def get_properties(self) -> PropertySnapshot:
+        """Читает все системные свойства подключенного устройства одним вызовом getprop"""
+        if not self.device:
+            raise AndroidTVTimeFixerError(locales.get("no_device_connected"))
+        return PropertySnapshot.parse(self.device.shell('getprop'))
+
+    @classmethod
+    def _device_info_property(cls, key: str) -> Optional[str]:
+        """Имя системного свойства для поля вида 'getprop <имя>' или None"""
+        match = re.fullmatch(r'getprop (\S+)', cls.DEVICE_INFO_COMMANDS[key])
+        return match.group(1) if match else None
+
+    def _device_info_commands(self, volatile: bool) -> Dict[str, str]:
+        """
+        Команды изменяемой (volatile=True, вместе с дампом getprop) или
+        неизменяемой части информации об устройстве. Поля 'getprop <имя>'
+        отдельными командами не выполняются - они берутся из дампа.
+        """
+        commands = {self.GETPROP_KEY: 'getprop'} if volatile else {}
+        for key, command in self.DEVICE_INFO_COMMANDS.items():
+            if self._device_info_property(key) is None and (key in self.DEVICE_INFO_VOLATILE) == volatile:
+                commands[key] = command
+        return commands
+
+    @staticmethod
+    def _device_identity(snapshot: PropertySnapshot) -> Tuple[str, str]:
+        """(серийный номер, fingerprint прошивки) для ключа кэша"""
+        serial = snapshot.get_str('ro.boot.serialno') or snapshot.get_str('ro.serialno')
+        return serial, snapshot.get_str('ro.build.fingerprint')
+
+    def _cached_device_info(self, snapshot: PropertySnapshot) -> Optional[Dict[str, str]]:
+        """Неизменяемые поля из кэша для устройства с тем же serial и fingerprint"""
+        serial, fingerprint = self._device_identity(snapshot)
+        cached = self.device_cache.get(serial, fingerprint)
+        if cached is not None:
+            logger.info(f"Using cached device properties for {serial}")
+        return cached
+
+    def _store_device_info(self, snapshot: PropertySnapshot, static: Dict[str, str]) -> None:
+        self.device_cache.put(*self._device_identity(snapshot), static)
+
+    def _merge_device_info(self, snapshot: PropertySnapshot, fresh: Dict[str, str],
+                           static: Dict[str, str]) -> Dict[str, str]:
+        """Собирает поля в порядке DEVICE_INFO_COMMANDS: свойства - из дампа, остальное - из команд"""
+        merged = {**static, **fresh}
+        info = {}
+        for key in self.DEVICE_INFO_COMMANDS:
+            prop = self._device_info_property(key)
+            info[key] = snapshot.get_str(prop) if prop else merged.get(key, '')
+        return info
             
     def show_current_settings(self) -> None:
         """Показывает только текущий сервер NTP"""
@@ -1133,8 +3326,612 @@ class AndroidTVTimeFixer:
         except Exception as e:
             raise AndroidTVTimeFixerError(locales.get("device_info_error", error=str(e)))
 
+    @classmethod
+    def parse_ip_list(cls, text: str) -> Tuple[List[str], List[str]]:
+        """
+        Разбирает список IP-адресов из строки или файла
+
+        Args:
+            text (str): IP-адреса через запятую/пробел или путь к файлу со списком
+
+        Returns:
+            Tuple[List[str], List[str]]: (корректные адреса без повторов, некорректные записи)
+        """
+        source = Path(text.strip().strip('"'))
+        if text.strip() and source.is_file():
+            with open(source, 'r', encoding='utf-8') as f:
+                text = f.read()
+
+        valid, invalid = [], []
+        for item in re.split(r'[,;\s]+', text):
+            item = item.strip()
+            if not item or item.startswith('#'):
+                continue
+            if cls.validate_ip(item):
+                if item not in valid:
+                    valid.append(item)
+            else:
+                invalid.append(item)
+        return valid, invalid
+
+    def _fleet_worker(self, ip: str, ntp_server: str, port: int = 5555) -> FleetResult:
+        """Подключение, установка и проверка сервера NTP на одном устройстве"""
+        start_time = time.time()
+        session = None
+        result = FleetResult(ip=ip, status='failed')
+        phase, phase_start = 'connect', time.perf_counter()
+
+        def finish_phase(next_phase: str) -> None:
+            # Длительность этапа фиксируется и при ошибке - для этапа, на котором она произошла
+            nonlocal phase, phase_start
+            now = time.perf_counter()
+            result.phases[phase] = round((now - phase_start) * 1000, 1)
+            phase, phase_start = next_phase, now
+
+        # Уже открытая сессия используется повторно, но новые подключения парка
+        # в пул не попадают и закрываются после обработки устройства
+        pooled = self.session_pool.get(ip, port)
+        try:
+            session = pooled or self._open_session(
+                ip, port, timeout=self.fleet_connect_timeout, show_progress=False
+            )
+            finish_phase('apply')
+            applied = self._apply_ntp_server(session, ntp_server)
+            result.previous_ntp, result.current_ntp, result.change = applied.previous, applied.current, applied.status
+            finish_phase('')
+            result.status = 'success'
+        except Exception as e:
+            finish_phase('')
+            result.error = str(e).splitlines()[0] if str(e) else type(e).__name__
+            if session is not None and session is pooled:
+                self.session_pool.discard(session)
+        finally:
+            if session is not None and session is not pooled:
+                session.close()
+            result.elapsed = time.time() - start_time
+        return result
+
+    def fleet_apply(self, ips: List[str], ntp_server: str,
+                    max_workers: Optional[int] = None) -> List[FleetResult]:
+        """
+        Применяет сервер NTP к списку устройств параллельно
+
+        Каждое устройство обрабатывается в собственной сессии, поэтому
+        self.device не затрагивается. Количество одновременных
+        подключений ограничено пулом потоков.
+
+        Args:
+            ips (List[str]): IP-адреса устройств
+            ntp_server (str): Сервер NTP для установки
+            max_workers (int): Размер пула, по умолчанию fleet_max_workers
+
+        Returns:
+            List[FleetResult]: Результаты в порядке исходного списка
+        """
+        max_workers = max_workers or self.fleet_max_workers
+        results: Dict[str, FleetResult] = {}
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(ips)) or 1) as executor:
+            futures = {executor.submit(self._fleet_worker, ip, ntp_server): ip for ip in ips}
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.ip] = result
+                color = Fore.GREEN if result.status == 'success' else Fore.RED
+                print(color + locales.get(
+                    "fleet_progress",
+                    done=len(results),
+                    total=len(ips),
+                    ip=result.ip,
+                    status=result.status
+                ))
+
+        return [results[ip] for ip in ips]
+
+    def show_fleet_report(self, results: List[FleetResult]) -> None:
+        """Выводит таблицу результатов по всем устройствам"""
+        print(Fore.YELLOW + f"{'IP':<17} {'Status':<9} {'Change':<10} {'Previous NTP':<25} {'Current NTP':<25} {'Time (s)':<9} Error")
+        print("-" * 121)
+        for result in results:
+            color = Fore.GREEN if result.status == 'success' else Fore.RED
+            print(
+                color +
+                f"{result.ip:<17} {result.status:<9} {result.change or '-':<10} {result.previous_ntp or 'N/A':<25} "
+                f"{result.current_ntp or 'N/A':<25} {result.elapsed:<9.1f} {result.error or ''}"
+            )
+
+        succeeded = sum(1 for result in results if result.status == 'success')
+        print(Fore.GREEN + locales.get("fleet_summary", succeeded=succeeded, failed=len(results) - succeeded))
+
+    def save_fleet_report(self, results: List[FleetResult], ntp_server: str) -> Path:
+        """Сохраняет отчет по парку в JSON-файл рядом с программой"""
+        report_file = self.current_path / f"fleet_report_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'ntp_server': ntp_server,
+                'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'results': [asdict(result) for result in results]
+            }, f, indent=2, ensure_ascii=False)
+        return report_file
+
+    def fleet_mode(self, ips: Optional[List[str]] = None) -> None:
+        """
+        Интерактивный режим применения сервера NTP к группе устройств
+
+        Args:
+            ips (List[str]): Готовый список адресов (например, из поиска); если не задан,
+                запрашивается у пользователя
+        """
+        if ips is None:
+            print(Fore.GREEN + locales.get("fleet_enter_ips"), end="")
+            ips, invalid = self.parse_ip_list(input(Fore.WHITE))
+            for item in invalid:
+                print(Fore.YELLOW + locales.get("fleet_invalid_ip", ip=item))
+        if not ips:
+            print(Fore.RED + locales.get("fleet_no_valid_ips"))
+            return
+
+        print(Fore.GREEN + locales.get("fleet_enter_target"), end="")
+        target = input(Fore.WHITE).strip()
+        if not target:
+            return
+        if self.validate_country_code(target) and target.lower() in self.ntp_servers:
+            ntp_server = self.ntp_servers[target.lower()]
+        else:
+            ntp_server = target
+
+        print(Fore.GREEN + locales.get("fleet_started", count=len(ips), ntp_server=ntp_server))
+        print(Fore.YELLOW + locales.get("confirm_connection"))
+        results = self.fleet_apply(ips, ntp_server)
+        self.show_fleet_report(results)
+
+        try:
+            report_file = self.save_fleet_report(results, ntp_server)
+            print(Fore.GREEN + locales.get("fleet_report_saved", path=str(report_file)))
+        except OSError as e:
+            logger.warning(locales.get("fleet_report_save_error", error=str(e)))
+
+    async def connect_async(self, ip: str, port: int = 5555,
+                            timeout: Optional[float] = None) -> AsyncDeviceSession:
+        """
+        Асинхронный аналог _open_session: одно рукопожатие с ожиданием
+        подтверждения ключа, повтор только если устройство недоступно
+
+        Args:
+            ip (str): IP-адрес устройства
+            port (int): Порт ADB
+            timeout (float): Время ожидания подключения, по умолчанию connection_timeout
+
+        Returns:
+            AsyncDeviceSession: Сессия с подключенным устройством
+        """
+        import asyncio
+        from adb_shell.adb_device_async import AdbDeviceTcpAsync
+
+        timeout = self.connection_timeout if timeout is None else timeout
+        signer = self.get_signer()
+        deadline = time.monotonic() + timeout
+        adb_device = AdbDeviceTcpAsync(ip, port, default_transport_timeout_s=9.)
+        state = ConnectionState.CONNECTING
+        last_error = None
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            auth_requested = []
+            try:
+                await adb_device.connect(
+                    **self._connect_options(signer, remaining, lambda _: auth_requested.append(True))
+                )
+                logger.info(locales.get('connection_success', ip=ip))
+                return AsyncDeviceSession(adb_device, ip, port)
+            except Exception as e:
+                state, last_error = self._classify_connection_error(e, bool(auth_requested))
+            try:
+                await adb_device.close()
+            except Exception:
+                pass
+
+            logger.debug(f"Connection to {ip}:{port}: {state.value} ({last_error})")
+            await asyncio.sleep(max(0., min(self.connection_poll_interval, deadline - time.monotonic())))
+
+        raise self._connection_error(state, timeout, last_error)
+
+    async def get_current_ntp_async(self, session: AsyncDeviceSession) -> str:
+        """Асинхронный аналог get_current_ntp для указанной сессии"""
+        try:
+            result = await session.shell_batch({'ntp_server': 'settings get global ntp_server'})
+            return result['ntp_server']
+        except Exception as e:
+            raise AndroidTVTimeFixerError(locales.get('failed_to_get_ntp_server', error=str(e)))
+
+    async def set_ntp_server_async(self, session: AsyncDeviceSession, ntp_server: str) -> NtpApplyResult:
+        """
+        Асинхронный аналог set_ntp_server: сравнение, запись и проверка за один вызов shell
+
+        Returns:
+            NtpApplyResult: 'changed' или 'unchanged', прежнее и текущее значение
+        """
+        try:
+            output = await session.shell(self._ntp_apply_script(ntp_server))
+            return self._parse_ntp_apply_output(ntp_server, output)
+        except Exception as e:
+            raise AndroidTVTimeFixerError(locales.get("ntp_server_update_failed", error=str(e)))
+
+    async def get_device_info_async(self, session: AsyncDeviceSession) -> dict:
+        """Асинхронный аналог get_device_info для указанной сессии"""
+        try:
+            fresh = await session.shell_batch(self._device_info_commands(volatile=True))
+            snapshot = PropertySnapshot.parse(fresh.pop(self.GETPROP_KEY, ''))
+            static = self._cached_device_info(snapshot)
+            if static is None:
+                static = await session.shell_batch(self._device_info_commands(volatile=False))
+                self._store_device_info(snapshot, static)
+            return self._merge_device_info(snapshot, fresh, static)
+        except Exception as e:
+            raise AndroidTVTimeFixerError(locales.get("device_info_error", error=str(e)))
+
+    async def _fleet_worker_async(self, ip: str, ntp_server: str, semaphore) -> FleetResult:
+        """Асинхронный аналог _fleet_worker: сессия открывается и закрывается в задаче"""
+        async with semaphore:
+            start_time = time.time()
+            session = None
+            result = FleetResult(ip=ip, status='failed')
+            try:
+                session = await self.connect_async(ip, timeout=self.fleet_connect_timeout)
+                applied = await self.set_ntp_server_async(session, ntp_server)
+                result.previous_ntp, result.current_ntp, result.change = applied.previous, applied.current, applied.status
+                result.status = 'success'
+            except Exception as e:
+                result.error = str(e).splitlines()[0] if str(e) else type(e).__name__
+            finally:
+                if session is not None:
+                    await session.close()
+                result.elapsed = time.time() - start_time
+            return result
+
+    async def fleet_apply_async(self, ips: List[str], ntp_server: str,
+                                concurrency: Optional[int] = None,
+                                on_result: Optional[Callable[[FleetResult], None]] = None) -> List[FleetResult]:
+        """
+        Применяет сервер NTP к списку устройств в одном цикле событий
+
+        Все устройства обслуживаются корутинами одного потока; число
+        одновременных подключений ограничено семафором.
+
+        Args:
+            ips (List[str]): IP-адреса устройств
+            ntp_server (str): Сервер NTP для установки
+            concurrency (int): Лимит одновременных сессий, по умолчанию fleet_async_concurrency
+            on_result (Callable): Вызывается для каждого результата по мере готовности
+
+        Returns:
+            List[FleetResult]: Результаты в порядке исходного списка
+        """
+        import asyncio
+
+        semaphore = asyncio.Semaphore(concurrency or self.fleet_async_concurrency)
+        results: Dict[str, FleetResult] = {}
+        tasks = [asyncio.ensure_future(self._fleet_worker_async(ip, ntp_server, semaphore)) for ip in ips]
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            results[result.ip] = result
+            if on_result is not None:
+                on_result(result)
+        return [results[ip] for ip in ips]
+
+    def load_inventory(self, path: Path) -> Tuple[List[InventoryEntry], List[str]]:
+        """
+        Загружает инвентаризацию устройств из CSV или YAML
+
+        Колонки (ключи): ip, port (необязательно), ntp_server, country.
+        Для каждой строки нужен ntp_server или код страны из списка пулов.
+        YAML требует пакет PyYAML: список записей или {devices: [...]}.
+        Повторы одного ip:port с тем же сервером объединяются, а с разными
+        серверами считаются ошибочными все строки этого устройства.
+
+        Args:
+            path (Path): Путь к файлу .csv, .yaml или .yml
+
+        Returns:
+            Tuple[List[InventoryEntry], List[str]]: (корректные записи, описания ошибочных строк)
+        """
+        path = Path(path)
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise AndroidTVTimeFixerError(locales.get("inventory_yaml_unavailable"))
+            with open(path, 'r', encoding='utf-8') as f:
+                try:
+                    data = yaml.safe_load(f) or []
+                except yaml.YAMLError as e:
+                    raise ValueError(str(e))
+            rows = data.get('devices', []) if isinstance(data, dict) else data
+        else:
+            import csv
+
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                try:
+                    rows = list(csv.DictReader(f))
+                except csv.Error as e:
+                    raise ValueError(str(e))
+
+        entries, invalid = [], []
+        rows_by_address: Dict[str, List[Tuple[int, InventoryEntry]]] = {}
+        for number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                invalid.append(f"#{number}: {row}")
+                continue
+            row = {str(key).strip().lower(): str(value).strip() for key, value in row.items()
+                   if key is not None and value is not None}
+            ip = row.get('ip', '')
+            country = row.get('country', '').lower() or None
+            ntp_server = row.get('ntp_server') or None
+            try:
+                port = int(row.get('port') or 5555)
+            except ValueError:
+                port = 0
+
+            if not self.validate_ip(ip) or not 0 < port < 65536:
+                invalid.append(f"#{number}: {ip or '?'}")
+                continue
+            if country is not None and not (self.validate_country_code(country) and country in self.ntp_servers):
+                invalid.append(f"#{number}: {ip} ({country})")
+                continue
+            if ntp_server is None and country is None:
+                invalid.append(f"#{number}: {ip}")
+                continue
+            entry = InventoryEntry(ip=ip, port=port, ntp_server=ntp_server, country=country)
+            rows_by_address.setdefault(f"{ip}:{port}", []).append((number, entry))
+
+        # Параллельная обработка одного устройства двумя строками недопустима:
+        # потоки делят одну сессию и перезаписывают сервер друг друга
+        for address, address_rows in rows_by_address.items():
+            targets = {entry.ntp_server or self.ntp_servers[entry.country] for _, entry in address_rows}
+            if len(targets) > 1:
+                numbers = ", ".join(f"#{number}" for number, _ in address_rows)
+                invalid.append(f"{numbers}: {address} ({' / '.join(sorted(targets))})")
+                continue
+            entries.append(address_rows[0][1])
+        return entries, invalid
+
+    def rollout(self, entries: List[InventoryEntry], output_path: Optional[Path],
+                max_workers: Optional[int] = None,
+                on_record: Optional[Callable[[dict], None]] = None,
+                show_progress: bool = True) -> List[FleetResult]:
+        """
+        Применяет серверы NTP по инвентаризации параллельно
+
+        Результат каждого устройства дописывается в output_path строкой JSON
+        сразу по завершении (с проверенным значением и длительностью этапов),
+        поэтому файл можно читать во время развертывания.
+
+        Args:
+            entries (List[InventoryEntry]): Записи инвентаризации
+            output_path (Path): Файл результатов (JSON lines), None - не записывать
+            max_workers (int): Размер пула, по умолчанию fleet_max_workers
+            on_record (Callable): Вызывается с записью результата каждого устройства
+            show_progress (bool): Выводить ли прогресс в консоль
+
+        Returns:
+            List[FleetResult]: Результаты в порядке инвентаризации
+        """
+        max_workers = max_workers or self.fleet_max_workers
+        results: Dict[int, FleetResult] = {}
+        output = open(output_path, 'a', encoding='utf-8') if output_path is not None else None
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(entries)) or 1) as executor:
+                futures = {
+                    executor.submit(
+                        self._fleet_worker,
+                        entry.ip,
+                        entry.ntp_server or self.ntp_servers[entry.country],
+                        entry.port
+                    ): index
+                    for index, entry in enumerate(entries)
+                }
+                for future in as_completed(futures):
+                    index = futures[future]
+                    entry = entries[index]
+                    result = future.result()
+                    results[index] = result
+                    target = entry.ntp_server or self.ntp_servers[entry.country]
+                    record = {
+                        'ip': entry.ip,
+                        'port': entry.port,
+                        'country': entry.country,
+                        'target_ntp': target,
+                        'verified': result.status == 'success' and result.current_ntp == target,
+                        'finished': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        **{key: value for key, value in asdict(result).items() if key != 'ip'}
+                    }
+
+                    if output is not None:
+                        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                        output.flush()
+                    if on_record is not None:
+                        on_record(record)
+                    if show_progress:
+                        color = Fore.GREEN if result.status == 'success' else Fore.RED
+                        print(color + locales.get(
+                            "fleet_progress",
+                            done=len(results),
+                            total=len(entries),
+                            ip=result.ip,
+                            status=result.status
+                        ))
+        finally:
+            if output is not None:
+                output.close()
+
+        return [results[index] for index in range(len(entries))]
+
+    def rollout_mode(self) -> None:
+        """Интерактивный режим развертывания по файлу инвентаризации"""
+        print(Fore.GREEN + locales.get("inventory_enter_path"), end="")
+        path = Path(input(Fore.WHITE).strip().strip('"'))
+        if not path.is_file():
+            print(Fore.RED + locales.get("inventory_not_found", path=str(path)))
+            return
+
+        try:
+            entries, invalid = self.load_inventory(path)
+        except (OSError, ValueError) as e:
+            print(Fore.RED + locales.get("inventory_load_error", error=str(e)))
+            return
+        for item in invalid:
+            print(Fore.YELLOW + locales.get("inventory_invalid_row", row=item))
+        if not entries:
+            print(Fore.RED + locales.get("fleet_no_valid_ips"))
+            return
+
+        output_path = self.current_path / f"rollout_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        print(Fore.GREEN + locales.get("inventory_started", count=len(entries), path=str(output_path)))
+        print(Fore.YELLOW + locales.get("confirm_connection"))
+        results = self.rollout(entries, output_path)
+        self.show_fleet_report(results)
+
+    def _prompt_number(self, prompt_key: str, default: float) -> float:
+        """Запрашивает положительное число, Enter - значение по умолчанию"""
+        print(Fore.GREEN + locales.get(prompt_key, default=default), end="")
+        value = input(Fore.WHITE).strip()
+        if not value:
+            return default
+        try:
+            number = float(value)
+            if number > 0:
+                return number
+        except ValueError:
+            pass
+        print(Fore.YELLOW + locales.get("drift_invalid_number"))
+        return default
+
+    def monitor_drift(self, ips: List[str], interval: Optional[float] = None,
+                      threshold_ms: Optional[float] = None, output_path: Optional[Path] = None,
+                      duration: Optional[float] = None) -> ClockDriftMonitor:
+        """
+        Запускает мониторинг расхождения часов устройств (блокирующий вызов)
+
+        Args:
+            ips (List[str]): IP-адреса устройств
+            interval (float): Интервал измерений для каждого устройства, сек
+            threshold_ms (float): Порог предупреждения, мс
+            output_path (Path): Файл результатов (.jsonl или .csv)
+            duration (float): Длительность мониторинга, сек (None - до Ctrl+C)
+
+        Returns:
+            ClockDriftMonitor: Завершившийся монитор
+        """
+        interval = interval or self.drift_interval
+        # Сессии мониторинга держатся все время измерений, поэтому у них свой
+        # пул по числу устройств, закрываемый по завершении. Сессия используется
+        # раз в interval: keepalive и простой с запасом больше интервала, иначе
+        # перед каждым измерением выполнялась бы лишняя проверка echo
+        pool = DeviceSessionPool(
+            idle_timeout=max(600, interval * 3),
+            keepalive_interval=interval * 2,
+            max_size=len(ips)
+        )
+        monitor = ClockDriftMonitor(
+            ips,
+            # Одна короткая попытка: недоступное устройство дает пропущенное
+            # измерение, а не занимает поток на весь интервал
+            session_factory=lambda ip: pool.acquire(
+                ip, 5555,
+                lambda: self._open_session(
+                    ip, timeout=self.drift_connect_timeout, show_progress=False, single_attempt=True
+                )
+            ),
+            discard=pool.discard,
+            interval=interval,
+            threshold_ms=threshold_ms or self.drift_threshold_ms,
+            max_workers=self.fleet_max_workers,
+            reference_server=self.drift_reference_server,
+            output_path=output_path
+        )
+
+        # На время мониторинга Ctrl+C должен останавливать его, а не завершать программу
+        previous_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+        try:
+            monitor.run(duration)
+        except KeyboardInterrupt:
+            monitor.stop()
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+            pool.close_all()
+        return monitor
+
+    def drift_mode(self) -> None:
+        """Интерактивный режим мониторинга расхождения часов"""
+        print(Fore.GREEN + locales.get("fleet_enter_ips"), end="")
+        ips, invalid = self.parse_ip_list(input(Fore.WHITE))
+        for item in invalid:
+            print(Fore.YELLOW + locales.get("fleet_invalid_ip", ip=item))
+        if not ips:
+            print(Fore.RED + locales.get("fleet_no_valid_ips"))
+            return
+
+        interval = self._prompt_number("drift_enter_interval", self.drift_interval)
+        threshold_ms = self._prompt_number("drift_enter_threshold", self.drift_threshold_ms)
+        output_path = self.current_path / f"drift_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+
+        print(Fore.GREEN + locales.get("drift_started", count=len(ips), path=str(output_path)))
+        self.monitor_drift(ips, interval, threshold_ms, output_path)
+        print(Fore.GREEN + locales.get("drift_stopped"))
+
+    def discover_devices(self, networks_text: str = "") -> List[str]:
+        """
+        Ищет устройства с включенной отладкой ADB по сети
+
+        Args:
+            networks_text (str): Подсети CIDR через запятую/пробел; пустая строка - подсеть хоста
+
+        Returns:
+            List[str]: Найденные IP-адреса
+        """
+        if not networks_text:
+            networks_text = " ".join(DeviceDiscovery.default_networks())
+        networks, invalid = DeviceDiscovery.parse_networks(networks_text)
+        for item in invalid:
+            print(Fore.YELLOW + locales.get("discover_invalid_network", network=item))
+        if not networks:
+            print(Fore.RED + locales.get("discover_no_networks"))
+            return []
+
+        print(Fore.GREEN + locales.get(
+            "discover_started",
+            networks=", ".join(str(network) for network in networks)
+        ))
+        return DeviceDiscovery().scan(networks)
+
+    def discovery_mode(self) -> None:
+        """Интерактивный поиск устройств с переходом к подключению или режиму парка"""
+        print(Fore.GREEN + locales.get("discover_enter_networks"), end="")
+        found = self.discover_devices(input(Fore.WHITE).strip())
+        if not found:
+            print(Fore.RED + locales.get("discover_found_none"))
+            return
+
+        print(Fore.GREEN + locales.get("discover_found", count=len(found)))
+        for i, ip in enumerate(found, 1):
+            print(Fore.YELLOW + f"{i}. {ip}")
+
+        print(Fore.GREEN + locales.get("discover_choose_action"), end="")
+        choice = input(Fore.WHITE).strip().lower()
+        if choice == 'f':
+            self.fleet_mode(found)
+        elif choice.isdigit() and 1 <= int(choice) <= len(found):
+            try:
+                self.connect(found[int(choice) - 1])
+                self.show_current_settings()
+            except AndroidTVTimeFixerError as e:
+                print(Fore.RED + locales.get('error_message', error=str(e)))
+
 def main():
-    fixer = AndroidTVTimeFixer()
+    # Выбор языка показывается до инициализации, чтобы первый запрос появлялся сразу
     print(locales.get("select_language"))  # Выводим сообщение для выбора языка
     print("1. " + locales.get("english"))  # Выбор для английского
     print("2. " + locales.get("russian"))  # Выбор для русского
@@ -1147,6 +3944,9 @@ def main():
     else:
         set_language("en")
         print(locales.get("language_set_en"))  # Подтверждение выбора
+    show_disclaimer()
+
+    fixer = AndroidTVTimeFixer()
         
     try:
         # Показываем начальные инструкции
@@ -1172,6 +3972,12 @@ def main():
             print(Fore.YELLOW + locales.get("ping_servers"))
             print(Fore.YELLOW + locales.get("menu_item_8"))
             print(Fore.YELLOW + locales.get("menu_item_9"))
+            print(Fore.YELLOW + locales.get("menu_item_fleet"))
+            print(Fore.YELLOW + locales.get("menu_item_discover"))
+            print(Fore.YELLOW + locales.get("menu_item_device_probe"))
+            print(Fore.YELLOW + locales.get("menu_item_logcat"))
+            print(Fore.YELLOW + locales.get("menu_item_drift"))
+            print(Fore.YELLOW + locales.get("menu_item_rollout"))
             print(Fore.YELLOW + locales.get("menu_item_10"))
 
             choice = input(Fore.GREEN + locales.get("menu_prompt")).strip()
@@ -1188,8 +3994,18 @@ def main():
                         if fixer.validate_country_code(code):
                             try:
                                 ntp_server = fixer.ntp_servers[code.lower()]
-                                fixer.fix_time(ntp_server)
-                                print(Fore.GREEN + locales.get('ntp_server_set', ntp_server=ntp_server))
+                                suggestion = fixer.suggest_ntp_server(code.lower())
+                                if suggestion and suggestion['server'] != ntp_server:
+                                    print(Fore.YELLOW + locales.get(
+                                        'cached_server_suggestion',
+                                        server=suggestion['server'],
+                                        rtt=f"{suggestion.get('delay') or suggestion['avg_rtt']:.0f}",
+                                        minutes=int((time.time() - suggestion['timestamp']) // 60)
+                                    ), end="")
+                                    if input(Fore.WHITE).strip().lower() in ('y', 'д'):
+                                        ntp_server = suggestion['server']
+                                applied = fixer.fix_time(ntp_server)
+                                print(Fore.GREEN + fixer.ntp_result_message(applied))
                             except KeyError:
                                 print(Fore.RED + locales.get('invalid_country_code'))
                             except AndroidTVTimeFixerError as e:
@@ -1239,6 +4055,45 @@ def main():
             elif choice == '8':
                 fixer.terminal_mode()
 		    
+            elif choice == '10':
+                fixer.fleet_mode()
+
+            elif choice == '11':
+                fixer.discovery_mode()
+
+            elif choice == '12':
+                print(Fore.GREEN + locales.get('enter_device_ip'), end="")
+                ip = input(Fore.WHITE).strip()
+                if fixer.validate_ip(ip):
+                    try:
+                        fixer.connect(ip)
+                        fixer.ping_ntp_servers_from_device()
+                    except AndroidTVTimeFixerError as e:
+                        print(Fore.RED + locales.get('error_message', error=str(e)))
+                else:
+                    print(Fore.RED + locales.get('invalid_ip_format'))
+
+            elif choice == '13':
+                print(Fore.GREEN + locales.get('enter_device_ip'), end="")
+                ip = input(Fore.WHITE).strip()
+                if fixer.validate_ip(ip):
+                    try:
+                        fixer.connect(ip)
+                        fixer.capture_logcat()
+                    except AndroidTVTimeFixerError as e:
+                        print(Fore.RED + locales.get('error_message', error=str(e)))
+                else:
+                    print(Fore.RED + locales.get('invalid_ip_format'))
+
+            elif choice == '14':
+                fixer.drift_mode()
+
+            elif choice == '15':
+                try:
+                    fixer.rollout_mode()
+                except AndroidTVTimeFixerError as e:
+                    print(Fore.RED + locales.get('error_message', error=str(e)))
+
             elif choice == '9':
                 print(Fore.GREEN + locales.get('exit_message'))
                 sys.exit(0)
@@ -1260,7 +4115,184 @@ def main():
 
     finally:
         # Явная очистка при завершении программы
+        fixer.session_pool.close_all()
         fixer.process_manager.cleanup()
 
+def _emit(record: dict) -> None:
+    """Выводит результат CLI одной строкой JSON"""
+    sys.stdout.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+    sys.stdout.flush()
+
+def _collect_ips(targets: Tuple[str, ...]) -> List[str]:
+    """Собирает IP-адреса из аргументов (адреса или пути к файлам), неверные - в stderr"""
+    ips: List[str] = []
+    for target in targets:
+        valid, invalid = AndroidTVTimeFixer.parse_ip_list(target)
+        ips.extend(valid)
+        for item in invalid:
+            logger.warning(locales.get("fleet_invalid_ip", ip=item))
+    return list(dict.fromkeys(ips))
+
+def _resolve_ntp_server(fixer: AndroidTVTimeFixer, server: Optional[str], country: Optional[str]) -> str:
+    import click
+
+    if server:
+        return server
+    if country and fixer.validate_country_code(country) and country.lower() in fixer.ntp_servers:
+        return fixer.ntp_servers[country.lower()]
+    raise click.UsageError(locales.get("invalid_country_code") if country else "Specify --server or --country")
+
+def build_cli():
+    """
+    Неинтерактивный интерфейс командной строки (click)
+
+    Каждая подкоманда выводит результаты в stdout построчно в формате JSON,
+    журнал пишется в stderr. Код возврата 1 означает, что хотя бы одна
+    операция завершилась ошибкой.
+    """
+    import click
+
+    def make_fixer(with_keys: bool = True) -> AndroidTVTimeFixer:
+        # Без локального сервера ADB и его atexit/сигналов: CLI вызывается из скриптов
+        # много раз подряд и не должен останавливать adb пользователя
+        fixer = AndroidTVTimeFixer(manage_adb=False)
+        if with_keys:
+            fixer.gen_keys()
+        return fixer
+
+    targets_argument = click.argument('targets', nargs=-1, required=True)
+
+    @click.group(context_settings={'help_option_names': ['-h', '--help']})
+    def cli():
+        """Android TV Time Fixer: batch commands with JSON lines output."""
+
+    @cli.command('set-ntp')
+    @targets_argument
+    @click.option('--server', '-s', help='NTP server to set.')
+    @click.option('--country', '-c', help='Country code of a pool.ntp.org zone.')
+    @click.option('--timeout', default=30.0, show_default=True, help='Connection timeout per device, sec.')
+    def set_ntp(targets, server, country, timeout):
+        """Set the NTP server on devices (IP addresses or files with lists)."""
+        fixer = make_fixer()
+        ntp_server = _resolve_ntp_server(fixer, server, country)
+        fixer.fleet_connect_timeout = timeout
+        failed = False
+        for ip in _collect_ips(targets):
+            result = fixer._fleet_worker(ip, ntp_server)
+            failed |= result.status != 'success'
+            _emit(asdict(result))
+        fixer.session_pool.close_all()
+        sys.exit(1 if failed else 0)
+
+    @cli.command('fleet-apply')
+    @targets_argument
+    @click.option('--server', '-s', help='NTP server to set.')
+    @click.option('--country', '-c', help='Country code of a pool.ntp.org zone.')
+    @click.option('--timeout', default=30.0, show_default=True, help='Connection timeout per device, sec.')
+    @click.option('--concurrency', default=256, show_default=True, help='Concurrent device sessions.')
+    def fleet_apply(targets, server, country, timeout, concurrency):
+        """Set the NTP server on many devices concurrently in one event loop."""
+        import asyncio
+
+        fixer = make_fixer()
+        ntp_server = _resolve_ntp_server(fixer, server, country)
+        fixer.fleet_connect_timeout = timeout
+        results = asyncio.run(fixer.fleet_apply_async(
+            _collect_ips(targets), ntp_server, concurrency,
+            on_result=lambda result: _emit(asdict(result))
+        ))
+        sys.exit(1 if any(result.status != 'success' for result in results) else 0)
+
+    @cli.command()
+    @click.argument('inventory', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--output', '-o', type=click.Path(dir_okay=False), help='Also append results to this file.')
+    @click.option('--timeout', default=30.0, show_default=True, help='Connection timeout per device, sec.')
+    @click.option('--workers', default=32, show_default=True, help='Devices processed in parallel.')
+    def rollout(inventory, output, timeout, workers):
+        """Set NTP servers from a CSV/YAML inventory (ip, port, ntp_server, country)."""
+        fixer = make_fixer()
+        fixer.fleet_connect_timeout = timeout
+        try:
+            entries, invalid = fixer.load_inventory(Path(inventory))
+        except (OSError, ValueError, AndroidTVTimeFixerError) as e:
+            raise click.ClickException(locales.get("inventory_load_error", error=str(e)))
+        for item in invalid:
+            logger.warning(locales.get("inventory_invalid_row", row=item))
+
+        results = fixer.rollout(
+            entries, Path(output) if output else None, workers,
+            on_record=_emit, show_progress=False
+        )
+        fixer.session_pool.close_all()
+        sys.exit(1 if any(result.status != 'success' for result in results) else 0)
+
+    @cli.command()
+    @targets_argument
+    @click.option('--timeout', default=30.0, show_default=True, help='Connection timeout per device, sec.')
+    def info(targets, timeout):
+        """Print device information."""
+        fixer = make_fixer()
+        failed = False
+        for ip in _collect_ips(targets):
+            session = None
+            try:
+                session = fixer.session_pool.acquire(
+                    ip, 5555,
+                    lambda: fixer._open_session(ip, timeout=timeout, show_progress=False)
+                )
+                fixer.device = session
+                _emit({'ip': ip, 'status': 'success', 'info': fixer.get_device_info()})
+            except Exception as e:
+                failed = True
+                if session is not None:
+                    fixer.session_pool.discard(session)
+                _emit({'ip': ip, 'status': 'failed', 'error': str(e).splitlines()[0] if str(e) else type(e).__name__})
+        fixer.session_pool.close_all()
+        sys.exit(1 if failed else 0)
+
+    @cli.command()
+    @click.argument('servers', nargs=-1)
+    @click.option('--timeout', default=2.0, show_default=True, help='Response timeout, sec.')
+    @click.option('--count', default=3, show_default=True, help='Requests per server.')
+    def probe(servers, timeout, count):
+        """Probe NTP servers from this host (all known servers by default)."""
+        fixer = make_fixer(with_keys=False)
+        if not servers:
+            servers = list(dict.fromkeys(list(fixer.ntp_servers.values()) + fixer.custom_ntp_servers))
+        probe_results = NTPProbeEngine(timeout=timeout, count=count, resolver=fixer.dns_cache).run(list(servers))
+        results = fixer._summarize_probe_results(probe_results, count)
+        fixer.save_probe_results(results)
+        for result in results:
+            _emit({key: value for key, value in result.items() if key != 'color'})
+        sys.exit(0 if any(result['status'] == 'Reachable' for result in results) else 1)
+
+    @cli.command()
+    @click.argument('networks', nargs=-1)
+    @click.option('--timeout', default=0.5, show_default=True, help='TCP connect timeout, sec.')
+    @click.option('--port', default=5555, show_default=True, help='ADB port.')
+    def discover(networks, timeout, port):
+        """Find devices with ADB over TCP (CIDR networks, this host's network by default)."""
+        networks_text = " ".join(networks) or " ".join(DeviceDiscovery.default_networks())
+        parsed, invalid = DeviceDiscovery.parse_networks(networks_text)
+        for item in invalid:
+            logger.warning(locales.get("discover_invalid_network", network=item))
+        if not parsed:
+            raise click.UsageError(locales.get("discover_no_networks"))
+        for ip in DeviceDiscovery(port=port, timeout=timeout).scan(parsed):
+            _emit({'ip': ip, 'port': port})
+
+    return cli
+
+def cli_main() -> None:
+    """Точка входа CLI: журнал в stderr, чтобы stdout содержал только JSON"""
+    for handler in logging.getLogger().handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setStream(sys.stderr)
+    build_cli()(prog_name='android_time_fixer')
+
 if __name__ == '__main__':
-    main()
+    # Без аргументов - интерактивное меню, с аргументами - подкоманды CLI
+    if len(sys.argv) > 1:
+        cli_main()
+    else:
+        main()